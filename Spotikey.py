@@ -1,21 +1,28 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+import gc
 import os
 import sys
-import json
 import threading
-import time
 import webbrowser
-import requests
 import keyboard
 import queue
 import signal
-import winshell
-from flask import Flask, request
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
-from win10toast import ToastNotifier
-import pystray
-from PIL import Image, ImageDraw, ImageTk
-from datetime import datetime
+from spotikey_core.engine import Engine
+from spotikey_core.metrics import METRICS, PhaseTimer
+from spotikey_core.updates import ReleaseChecker, is_newer
+from spotikey_core.oauth import LocalServer, LoginAttempt, LoginCancelled, LoginTimeout
+from spotikey_core.notifications import ToastBackend
+from spotikey_core.ipc import start_command_server
+from spotikey_core.prefetch import hotkey_prefix
+
+# Flask, PIL, pystray, win10toast and winshell are imported on first use so
+# the hotkey can be armed before they load.
+
+STARTUP = PhaseTimer(STARTUP_STARTED, "--profile-startup" in sys.argv or bool(os.getenv("SPOTIKEY_PROFILE_STARTUP")))
+STARTUP.mark("imports")
 
 # === APP INFO ===
 APP_NAME = "Spotikey"
@@ -34,97 +41,162 @@ def resource_path(relative_path):
 APPDATA_DIR = os.path.join(os.getenv("APPDATA"), "Spotikey")
 os.makedirs(APPDATA_DIR, exist_ok=True)
 
-DATA_FILE = os.path.join(APPDATA_DIR, "spotikey_data.json")
-LOG_FILE = os.path.join(APPDATA_DIR, "spotikey.log")
+STARTUP_PROFILE_FILE = os.path.join(APPDATA_DIR, "spotikey_startup.txt")
+UPDATE_CACHE_FILE = os.path.join(APPDATA_DIR, "spotikey_update_cache.json")
 ICON_FILE = resource_path("spotikey.ico")
 CERT_FILE = resource_path("cert.pem")
 KEY_FILE = resource_path("key.pem")
 
-# === DEFAULT DATA ===
-DEFAULT_DATA = {
-    "hotkey": "ctrl+alt+l",
-    "notifications": True,
-    "client_id": "",
-    "client_secret": "",
-    "token_info": {},
-    "run_on_startup": False
-}
+# === ENGINE ===
+# Settings, tokens, the Spotify client and the like pipeline live in the
+# headless engine; this module adds the window, tray, hotkey and login flow.
+ENGINE = Engine(APPDATA_DIR, APP_NAME, APP_VERSION, notifier_backend=ToastBackend(icon_path=ICON_FILE, duration=3))
+STORE = ENGINE.store
+SPOTIFY = ENGINE.spotify
+LOGBOOK = ENGINE.logbook
+NOTIFIER = ENGINE.notifier
+TOKENS = ENGINE.tokens
+OUTBOX = ENGINE.outbox
+SCHEDULER = ENGINE.scheduler
+ACTIONS = ENGINE.actions
+RELEASES = ReleaseChecker(GITHUB_API_URL, UPDATE_CACHE_FILE, ttl=STORE.get("update_check_ttl_hours", 6) * 3600)
 
 # === GLOBALS ===
-LOG_MESSAGES = []
+LOG_MESSAGES = LOGBOOK.recent
 tray_icon = None
 main_window = None
-current_hotkey = None
-notifier = ToastNotifier()
-gui_queue = queue.Queue()
-TOKEN_INFO = {}
+current_hotkeys = []
 LATEST_VERSION = None
+FLASK_APP = None
+LOGIN_ATTEMPT = None
+COMMAND_SERVER = None
+SERVICES_STARTED = False
+
+# === UI THREAD ===
+# Tk is only ever touched from the main thread. Other threads (tray, hotkey,
+# scheduler jobs, store subscribers) hand work over with ui_call(), which puts
+# it on UI_QUEUE and wakes the window's mainloop with a <<SpotikeyUI>> virtual
+# event; queueing an event is the one Tk call the threaded Tcl shipped with
+# CPython allows from other threads. With no window open the main thread
+# waits on UI_QUEUE instead, with a timeout only so Ctrl+C and SIGTERM still
+# get through on Windows.
+UI_QUEUE = queue.SimpleQueue()
+UI_WAKE_EVENT = "<<SpotikeyUI>>"
+UI_IDLE_TIMEOUT = 1.0
+
+def ui_call(func, *args):
+    """Run func(*args) on the Tk thread: now if already there, otherwise as soon as it wakes."""
+    if threading.current_thread() is threading.main_thread():
+        func(*args)
+        return
+    UI_QUEUE.put((func, args))
+    window = main_window
+    if window is not None:
+        try:
+            window.event_generate(UI_WAKE_EVENT, when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # the window is closing; run_ui_loop() picks the call up from UI_QUEUE
+
+def run_ui_call(func, args):
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"[WARN] UI call {getattr(func, '__name__', func)} failed: {e}")
+
+def run_ui_calls():
+    while True:
+        try:
+            run_ui_call(*UI_QUEUE.get_nowait())
+        except queue.Empty:
+            return
+
+def open_window():
+    """Show the main window, creating it and running its mainloop if it isn't open."""
+    global main_window
+    if main_window is not None:
+        main_window.show_window()
+        return
+    window = SpotikeyMain()
+    main_window = window
+
+    window.bind(UI_WAKE_EVENT, lambda event: run_ui_calls())
+    window.after_idle(run_ui_calls)  # calls queued before the binding existed
+    try:
+        window.mainloop()
+    finally:
+        main_window = None
+        # Tk widgets hold reference cycles; free the closed window's memory now rather than eventually.
+        gc.collect()
+
+def run_ui_loop():
+    """Park the main thread until another thread hands it Tk work (e.g. the tray's Open Spotikey)."""
+    while True:
+        try:
+            item = UI_QUEUE.get(timeout=UI_IDLE_TIMEOUT)
+        except queue.Empty:
+            continue  # a blocking get() without a timeout can't be interrupted by Ctrl+C on Windows
+        run_ui_call(*item)
 
 # === DATA HANDLING ===
 def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                return json.load(f)
-        except:
-            pass
-    save_data(DEFAULT_DATA)
-    return DEFAULT_DATA.copy()
+    """Return a copy of the settings; reads are served from STORE's memory."""
+    return STORE.snapshot()
 
 def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    STORE.update(data)
 
 def log_message(msg):
-    print(msg)
-    LOG_MESSAGES.append(msg)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(msg + "\n")
+    ENGINE.log(msg)
+
+def show_in_window(msg):
     if main_window and main_window.log_box:
-        main_window.refresh_log()
+        main_window.append_log(msg)
+
+ENGINE.add_log_listener(show_in_window)
 
 def clear_log():
-    open(LOG_FILE, "w").close()
-    LOG_MESSAGES.clear()
+    LOGBOOK.clear()
     if main_window:
-        main_window.refresh_log()
+        main_window.clear_log_view()
     log_message("🧹 Log cleared.")
 
 def load_log():
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            return [line.strip() for line in f]
-    return []
+    """Recent log lines, served from LOGBOOK's in-memory ring rather than the file."""
+    return list(LOGBOOK.recent)
 
-def notify(title, message):
-    data = load_data()
-    if data.get("notifications", True):
-        try:
-            notifier.show_toast(title, message, duration=3, threaded=True, icon_path=ICON_FILE)
-        except Exception as e:
-            print(f"[WARN] Notification failed: {e}")
+def notify(title, message, group=None, count=1):
+    """Queue a toast; bursts in the same group collapse into one summary."""
+    NOTIFIER.notify(title, message, group=group, count=count)
 
 # === UPDATE CHECKER ===
-def check_for_update():
-    """Check GitHub for the latest Spotikey release version."""
+def check_for_update(force=False):
+    """Check GitHub for the latest Spotikey release version.
+
+    Served from the cached answer within the TTL; force=True revalidates with a conditional request.
+    """
     try:
-        response = requests.get(GITHUB_API_URL, timeout=5)
-        if response.status_code == 200:
-            latest = response.json().get("tag_name", "").lstrip("v")
-            if latest and latest != APP_VERSION:
-                return latest
+        latest = (RELEASES.latest_tag(force=force) or "").lstrip("v")
+        if latest and is_newer(latest, APP_VERSION):
+            return latest
         return None
     except Exception as e:
         print(f"[WARN] Update check failed: {e}")
         return None
 
-def prompt_update(latest_version):
-    """Prompt user with update info."""
-    if messagebox.askyesno(APP_NAME, f"A new version of Spotikey is available (v{latest_version}).\nWould you like to download it now?"):
-        webbrowser.open(GITHUB_REPO_URL + "/releases")
+def background_update_check():
+    """Startup update check, run off the main thread; the result is surfaced once it arrives."""
+    global LATEST_VERSION
+    LATEST_VERSION = check_for_update()
+    if LATEST_VERSION:
+        log_message(f"⬆ Spotikey v{LATEST_VERSION} is available: {GITHUB_REPO_URL}/releases")
+        notify(APP_NAME, f"A new version of Spotikey is available (v{LATEST_VERSION}).")
+        ui_call(lambda: main_window and main_window.show_update_available())
 
 def manual_update_check():
-    latest_version = check_for_update()
+    """Check GitHub on a worker, then answer with a dialog on the Tk thread."""
+    SCHEDULER.submit(lambda: ui_call(show_update_result, check_for_update(force=True)))
+
+def show_update_result(latest_version):
     if latest_version:
         if messagebox.askyesno(APP_NAME, f"A new version of Spotikey is available (v{latest_version}).\nWould you like to download it now?"):
             webbrowser.open(GITHUB_REPO_URL + "/releases")
@@ -132,9 +204,25 @@ def manual_update_check():
         messagebox.showinfo(APP_NAME, "You are running the latest version of Spotikey.")
 
 # === ICONS ===
+ICON_IMAGES = {}
+
+def icon_image(size=None):
+    """The Spotikey icon, decoded once and resized once per size; shared, so don't modify it."""
+    image = ICON_IMAGES.get(size)
+    if image is None:
+        from PIL import Image
+        if size is None:
+            image = Image.open(ICON_FILE)
+            image.load()
+        else:
+            image = icon_image().resize(size, Image.LANCZOS)
+        ICON_IMAGES[size] = image
+    return image
+
 def load_icon():
+    from PIL import Image, ImageDraw
     try:
-        return Image.open(ICON_FILE)
+        return icon_image()
     except Exception as e:
         print(f"[WARN] Failed to load icon: {e}")
         image = Image.new("RGB", (64, 64), (29, 185, 84))
@@ -143,148 +231,192 @@ def load_icon():
         return image
 
 def get_tk_logo():
+    from PIL import ImageTk
     try:
-        img = Image.open(ICON_FILE)
-        img = img.resize((48, 48), Image.LANCZOS)
-        return ImageTk.PhotoImage(img)
+        return ImageTk.PhotoImage(icon_image((48, 48)))
     except Exception as e:
         print(f"[WARN] Failed to load Spotikey logo: {e}")
         return None
 
 # === FLASK SERVER ===
-app = Flask(__name__)
 REDIRECT_URI = "https://127.0.0.1:8888/callback"
-SCOPE = "user-library-modify user-read-currently-playing"
+SCOPE = ("user-library-modify user-library-read user-read-currently-playing user-read-playback-state "
+         "user-read-recently-played playlist-read-private playlist-read-collaborative "
+         "playlist-modify-public playlist-modify-private")
 
-@app.route("/callback")
 def callback():
-    global TOKEN_INFO
+    from flask import request
+    attempt = LOGIN_ATTEMPT
+    if attempt is None or request.args.get("state") != attempt.state:
+        return "Error: This login link has expired. Please authorise again from Spotikey.", 400
     code = request.args.get("code")
     if not code:
+        attempt.complete(error=RuntimeError(request.args.get("error", "no code returned")))
         return "Error: No code returned!"
-    data = load_data()
-    TOKEN_INFO = exchange_code_for_token(code, data["client_id"], data["client_secret"])
-    if TOKEN_INFO:
-        data["token_info"] = TOKEN_INFO
-        save_data(data)
-        notify(APP_NAME, "Authentication successful!")
+    token_info = exchange_code_for_token(code, STORE.get("client_id"), STORE.get("client_secret"),
+                                         attempt.code_verifier)
+    if token_info:
+        attempt.complete(token_info)
         return "Authentication successful! You can close this tab."
+    attempt.complete(error=RuntimeError("could not exchange code for token"))
     return "Error: Could not exchange code for token."
 
-def start_flask():
-    app.run(host="127.0.0.1", port=8888, ssl_context=(CERT_FILE, KEY_FILE))
+def metrics():
+    if not STORE.get("metrics_enabled", False):
+        return "Metrics are disabled.", 404
+    return METRICS.snapshot()
+
+def get_flask_app():
+    """Build the Flask app on first use; it is only needed for OAuth and /metrics."""
+    global FLASK_APP
+    if FLASK_APP is None:
+        from flask import Flask
+        FLASK_APP = Flask(__name__)
+        FLASK_APP.add_url_rule("/callback", view_func=callback)
+        FLASK_APP.add_url_rule("/metrics", view_func=metrics)
+    return FLASK_APP
+
+LOCAL_SERVER = LocalServer(get_flask_app, "127.0.0.1", 8888, ssl_context=(CERT_FILE, KEY_FILE))
+
+def ensure_flask():
+    """Start the local Flask server if it isn't already running."""
+    LOCAL_SERVER.start()
 
 # === SPOTIFY AUTH ===
-def exchange_code_for_token(code, client_id, client_secret):
-    token_url = "https://accounts.spotify.com/api/token"
-    response = requests.post(token_url, data={
+def exchange_code_for_token(code, client_id, client_secret, code_verifier=None):
+    form = {
         "grant_type": "authorization_code",
         "code": code,
         "redirect_uri": REDIRECT_URI,
         "client_id": client_id,
-        "client_secret": client_secret,
-    })
-    data = response.json()
+    }
+    if client_secret:
+        form["client_secret"] = client_secret
+    else:
+        form["code_verifier"] = code_verifier
+    data = SPOTIFY.request_token(form)
     if "access_token" in data:
         data['expires_at'] = int(time.time()) + data.get('expires_in', 3600)
         return data
     return None
 
-def refresh_token(refresh_token, client_id, client_secret):
-    token_url = "https://accounts.spotify.com/api/token"
-    response = requests.post(token_url, data={
-        "grant_type": "refresh_token",
-        "refresh_token": refresh_token,
-        "client_id": client_id,
-        "client_secret": client_secret,
-    })
-    data = response.json()
-    if 'access_token' in data:
-        if 'refresh_token' not in data:
-            data['refresh_token'] = refresh_token
-        data['expires_at'] = int(time.time()) + data.get('expires_in', 3600)
-        save_token_info(data)
-        return data
-    return None
-
 def save_token_info(token_info):
-    data = load_data()
-    data["token_info"] = token_info
-    save_data(data)
+    ENGINE.save_token_info(token_info)
+
+def cancel_login():
+    """Abandon a pending browser login, e.g. because a new one was started."""
+    global LOGIN_ATTEMPT
+    attempt, LOGIN_ATTEMPT = LOGIN_ATTEMPT, None
+    if attempt is not None:
+        attempt.cancel()
 
 def authenticate_spotify():
-    global TOKEN_INFO
+    global LOGIN_ATTEMPT
     data = load_data()
-    if not data["client_id"] or not data["client_secret"]:
+    if not data["client_id"]:
         return False
-    TOKEN_INFO = data.get("token_info", {})
-    if TOKEN_INFO and TOKEN_INFO.get("expires_at", 0) > int(time.time()):
+    TOKENS.set_token(data.get("token_info", {}))
+    if TOKENS.is_valid():
         log_message("✅ Existing token is still valid.")
         return True
-    if TOKEN_INFO and "refresh_token" in TOKEN_INFO:
-        refreshed = refresh_token(TOKEN_INFO["refresh_token"], data["client_id"], data["client_secret"])
-        if refreshed:
-            TOKEN_INFO = refreshed
-            log_message("🔄 Token refreshed successfully.")
-            return True
+    if TOKENS.refresh_now():
+        return True
     log_message("🌐 No valid token found, starting login flow...")
-    auth_url = (
-        "https://accounts.spotify.com/authorize?"
-        + f"client_id={data['client_id']}&response_type=code"
-        + f"&redirect_uri={REDIRECT_URI}&scope={SCOPE}&show_dialog=true"
-    )
-    threading.Thread(target=start_flask, daemon=True).start()
-    webbrowser.open(auth_url)
-    while not TOKEN_INFO:
-        time.sleep(1)
-    save_token_info(TOKEN_INFO)
-    notify(APP_NAME, "New token generated!")
+    cancel_login()
+    attempt = LOGIN_ATTEMPT = LoginAttempt()
+    try:
+        ensure_flask()
+    except OSError as e:
+        LOGIN_ATTEMPT = None
+        log_message(f"❌ Could not start the login callback server on port 8888: {e}")
+        return False
+    webbrowser.open(attempt.authorize_url(SPOTIFY.accounts_base, data["client_id"], REDIRECT_URI, SCOPE,
+                                          use_pkce=not data["client_secret"]))
+    try:
+        token_info = attempt.wait(timeout=STORE.get("login_timeout", 300))
+    except LoginCancelled:
+        log_message("⏹ Login cancelled.")
+        return False
+    except (LoginTimeout, RuntimeError) as e:
+        log_message(f"❌ Login failed: {e}")
+        return False
+    finally:
+        if LOGIN_ATTEMPT is attempt:
+            LOGIN_ATTEMPT = None
+        if LOGIN_ATTEMPT is None and not STORE.get("metrics_enabled", False):
+            LOCAL_SERVER.stop()
+    save_token_info(token_info)
+    TOKENS.set_token(token_info)
+    notify(APP_NAME, "Authentication successful!")
     return True
 
-def get_headers():
-    data = load_data()
-    if TOKEN_INFO.get("expires_at", 0) <= int(time.time()):
-        refreshed = refresh_token(TOKEN_INFO.get("refresh_token"), data["client_id"], data["client_secret"])
-        if refreshed:
-            TOKEN_INFO.update(refreshed)
-            save_token_info(TOKEN_INFO)
-            log_message("🔄 Token refreshed successfully.")
-        else:
-            log_message("❌ Token expired and refresh failed. Please re-login.")
-            notify(APP_NAME, "Token expired. Please re-login.")
-            return None
-    return {
-        "Authorization": f"Bearer {TOKEN_INFO['access_token']}",
-        "Content-Type": "application/json"
-    }
-
 # === SPOTIFY ACTION ===
 def like_current_song():
-    headers = get_headers()
-    if not headers:
-        return
+    """Hotkey callback: queue the press for the action worker and return immediately."""
+    ACTIONS.press()
+
+def like_current_album():
+    """Like every track on the playing track's album; runs in the background, see the log for progress."""
+    ENGINE.like_bulk("album")
+
+def like_queue():
+    ENGINE.like_bulk("queue")
+
+def like_recently_played():
+    ENGINE.like_bulk("recent")
+
+def cancel_bulk_like():
+    ENGINE.cancel_bulk()
+
+def bulk_running():
+    return ENGINE.bulk is not None and ENGINE.bulk.running()
+
+def export_history():
+    """Write the like history to spotikey_history.csv in the data folder."""
     try:
-        playback = requests.get("https://api.spotify.com/v1/me/player/currently-playing", headers=headers)
-        if playback.status_code == 200 and playback.json():
-            track = playback.json()["item"]
-            track_name = track["name"]
-            response = requests.put(
-                "https://api.spotify.com/v1/me/tracks",
-                headers=headers,
-                json={"ids": [track["id"]]}
-            )
-            if response.status_code in (200, 201):
-                log_message(f"💚 Liked: {track_name}")
-                notify(APP_NAME, f"💚 Liked: {track_name}")
-            else:
-                log_message(f"❌ Failed to like track: {track_name}")
-        else:
-            log_message("⚠ No track is currently playing.")
-    except Exception as e:
-        log_message(f"❌ Error: {e}")
+        ENGINE.export_history()
+    except (RuntimeError, OSError) as e:
+        log_message(f"❌ Could not export like history: {e}")
+
+def dump_metrics():
+    ENGINE.dump_metrics()
+
+# === DIAGNOSTICS ===
+def profiling():
+    return ENGINE.diagnostics.profiler is not None
+
+def tracing_allocations():
+    return ENGINE.diagnostics.status()["tracing_allocations"]
+
+def start_profiling():
+    try:
+        ENGINE.start_profile()
+    except RuntimeError as e:
+        log_message(f"⚠ Could not start profiling: {e}")
+
+def stop_profiling():
+    """Stop the profile and write the .prof and .folded reports; runs off the tray thread."""
+    try:
+        ENGINE.stop_profile()
+    except OSError as e:
+        log_message(f"❌ Could not save the profile: {e}")
+
+def take_heap_snapshot():
+    try:
+        ENGINE.heap_snapshot()
+    except OSError as e:
+        log_message(f"❌ Could not save the heap snapshot: {e}")
+
+def open_reports_folder():
+    try:
+        os.makedirs(ENGINE.profiles_dir, exist_ok=True)
+        os.startfile(ENGINE.profiles_dir)
+    except (AttributeError, OSError) as e:
+        log_message(f"❌ Could not open {ENGINE.profiles_dir}: {e}")
 
 # === RUN ON STARTUP ===
 def set_run_on_startup(enable):
+    import winshell
     shortcut_path = os.path.join(winshell.startup(), "Spotikey.lnk")
     if enable:
         winshell.CreateShortcut(
@@ -302,6 +434,9 @@ def set_run_on_startup(enable):
             pass
 
 # === GUI ===
+MAX_LOG_LINES = 500
+LOG_FLUSH_MS = 100
+
 class SpotikeyMain(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -312,16 +447,15 @@ class SpotikeyMain(tk.Tk):
         except Exception as e:
             print(f"[WARN] Could not set taskbar AppUserModelID: {e}")
 
-        icon_path = resource_path("spotikey.ico")
         try:
-            if os.path.exists(icon_path):
-                self.iconbitmap(icon_path)
+            if os.path.exists(ICON_FILE):
+                self.iconbitmap(ICON_FILE)
         except Exception as e:
             print(f"[WARN] Could not set window icon: {e}")
 
         try:
-            icon_img = Image.open(icon_path).resize((32, 32), Image.LANCZOS)
-            icon_photo = ImageTk.PhotoImage(icon_img)
+            from PIL import ImageTk
+            icon_photo = ImageTk.PhotoImage(icon_image((32, 32)))
             self.iconphoto(True, icon_photo)
         except Exception as e:
             print(f"[WARN] Could not set taskbar icon: {e}")
@@ -332,23 +466,37 @@ class SpotikeyMain(tk.Tk):
         self.configure(bg="#191414")
         self.logo_img = get_tk_logo()
         self.log_box = None
+        self.log_queue = queue.SimpleQueue()
+        self.log_pending = False
         self.create_widgets()
+        self.unsubscribe = STORE.subscribe(lambda changed: ui_call(self.apply_settings, changed),
+                                           keys=("hotkey", "notifications", "run_on_startup"))
         self.protocol("WM_DELETE_WINDOW", self.hide_to_tray)
         self.bind("<Unmap>", self.on_minimize)
 
+    def destroy(self):
+        self.unsubscribe()
+        self.log_box = None
+        super().destroy()
+
     def on_minimize(self, event):
-        if self.state() == 'iconic':
+        if self.log_box is not None and self.state() == 'iconic':
             self.hide_to_tray()
 
     def hide_to_tray(self):
-        self.withdraw()
+        """Hide to the tray; with release_window_when_hidden the window is destroyed and rebuilt on open."""
         log_message("🔽 Spotikey minimized to tray.")
+        if SERVICES_STARTED and STORE.get("release_window_when_hidden", True):
+            # Ends this window's mainloop; its widgets, images and log text go with it.
+            self.destroy()
+        else:
+            self.withdraw()
         notify(APP_NAME, "Spotikey is still running in the system tray.")
 
     def show_window(self):
         self.deiconify()
         self.lift()
-        self.refresh_log()
+        self.log_box.see(tk.END)
 
     def create_widgets(self):
         top_frame = tk.Frame(self, bg="#191414")
@@ -372,18 +520,18 @@ class SpotikeyMain(tk.Tk):
         # App version label
         tk.Label(self, text=f"{APP_NAME} v{APP_VERSION}", font=("Arial", 16, "bold"), bg="#191414", fg="#1DB954").pack(pady=5)
 
-        # Update indicator
-        if LATEST_VERSION:
-            update_label = tk.Label(
-                self,
-                text=f"New version available (v{LATEST_VERSION}) – Click to download",
-                font=("Arial", 10, "bold"),
-                bg="#191414",
-                fg="red",
-                cursor="hand2"
-            )
-            update_label.pack(pady=(0, 10))
-            update_label.bind("<Button-1>", lambda e: webbrowser.open(GITHUB_REPO_URL + "/releases"))
+        # Update indicator (filled in by show_update_available once the background check finishes)
+        self.update_label = tk.Label(
+            self,
+            text="",
+            font=("Arial", 10, "bold"),
+            bg="#191414",
+            fg="red",
+            cursor="hand2"
+        )
+        self.update_label.pack(pady=(0, 10))
+        self.update_label.bind("<Button-1>", lambda e: webbrowser.open(GITHUB_REPO_URL + "/releases"))
+        self.show_update_available()
 
         self.log_box = scrolledtext.ScrolledText(self, wrap=tk.WORD, bg="#000000", fg="white", height=12)
         self.log_box.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -422,19 +570,75 @@ class SpotikeyMain(tk.Tk):
                   font=("Arial", 10, "bold"), relief="flat",
                   command=manual_update_check).pack(side="left", padx=10)
 
+    def show_update_available(self):
+        if LATEST_VERSION:
+            self.update_label.config(text=f"New version available (v{LATEST_VERSION}) – Click to download")
+
     def refresh_log(self):
         self.log_box.delete(1.0, tk.END)
-        for msg in load_log():
-            self.log_box.insert(tk.END, msg + "\n")
+        lines = load_log()[-MAX_LOG_LINES:]
+        if lines:
+            self.log_box.insert(tk.END, "\n".join(lines) + "\n")
         self.log_box.see(tk.END)
 
+    def append_log(self, msg):
+        """Queue a line for the log pane; safe to call from any thread."""
+        self.log_queue.put(msg)
+        self.schedule_drain()
+
+    def clear_log_view(self):
+        self.log_queue.put(None)
+        self.schedule_drain()
+
+    def schedule_drain(self):
+        # One pending flush at a time; an idle window has no timer running.
+        if not self.log_pending:
+            self.log_pending = True
+            ui_call(self.arm_drain)
+
+    def arm_drain(self):
+        if self.log_box is not None:
+            self.after(LOG_FLUSH_MS, self.drain_log)
+
+    def drain_log(self):
+        """Insert queued lines in one batch on the Tk thread, keeping at most MAX_LOG_LINES."""
+        self.log_pending = False
+        lines = []
+        cleared = False
+        try:
+            while True:
+                msg = self.log_queue.get_nowait()
+                if msg is None:
+                    lines, cleared = [], True
+                else:
+                    lines.append(msg)
+        except queue.Empty:
+            pass
+        if cleared:
+            self.log_box.delete(1.0, tk.END)
+        if lines:
+            self.log_box.insert(tk.END, "\n".join(lines[-MAX_LOG_LINES:]) + "\n")
+            line_count = int(self.log_box.index("end-1c").split(".")[0]) - 1
+            if line_count > MAX_LOG_LINES:
+                self.log_box.delete(1.0, f"{line_count - MAX_LOG_LINES + 1}.0")
+            self.log_box.see(tk.END)
+
+    def apply_settings(self, changed):
+        """Reflect settings changed elsewhere (e.g. an edited data file) in the widgets."""
+        if "hotkey" in changed:
+            self.hotkey_entry.delete(0, tk.END)
+            self.hotkey_entry.insert(0, changed["hotkey"])
+        if "notifications" in changed:
+            self.notifications_var.set(changed["notifications"])
+        if "run_on_startup" in changed:
+            self.startup_var.set(changed["run_on_startup"])
+
     def save_settings(self):
         data = load_data()
         data["hotkey"] = self.hotkey_entry.get()
         data["notifications"] = self.notifications_var.get()
         data["run_on_startup"] = self.startup_var.get()
         save_data(data)
-        rebind_hotkey()
         set_run_on_startup(data["run_on_startup"])
         messagebox.showinfo(APP_NAME, "Settings saved!")
 
@@ -464,7 +668,7 @@ class AuthoriseWindow(tk.Toplevel):
         self.client_id_entry.insert(0, data.get("client_id", ""))
         self.client_id_entry.pack(pady=5)
 
-        tk.Label(self, text="Client Secret:", bg="#191414", fg="white").pack(pady=(10, 0))
+        tk.Label(self, text="Client Secret (optional, leave blank to use PKCE):", bg="#191414", fg="white").pack(pady=(10, 0))
         self.client_secret_entry = tk.Entry(self, width=40, show="*")
         self.client_secret_entry.insert(0, data.get("client_secret", ""))
         self.client_secret_entry.pack(pady=5)
@@ -478,7 +682,8 @@ class AuthoriseWindow(tk.Toplevel):
         data["client_secret"] = self.client_secret_entry.get()
         save_data(data)
         self.destroy()
-        authenticate_spotify()
+        # The login waits on the browser callback; keep the window responsive meanwhile.
+        threading.Thread(target=authorise_and_start, daemon=True).start()
 
 # === HELP WINDOW ===
 class HelpWindow(tk.Toplevel):
@@ -509,7 +714,7 @@ class HelpWindow(tk.Toplevel):
             "6. Select Web API as the app type.\n"
             "7. Read and agree to the Spotify Developer Terms of Service.\n"
             "8. Click Save.\n"
-            "9. Copy the Client ID and Client Secret, then paste them into Spotikey’s Authorise window."
+            "9. Copy the Client ID (and optionally the Client Secret; without it Spotikey uses PKCE), then paste them into Spotikey’s Authorise window."
         )
 
         text_box = scrolledtext.ScrolledText(
@@ -529,85 +734,157 @@ class HelpWindow(tk.Toplevel):
 def create_tray_icon():
     global tray_icon
     def open_gui(icon, item):
-        if main_window:
-            main_window.show_window()
-        else:
-            gui_queue.put(True)
+        ui_call(open_window)
     def exit_app(icon, item):
         log_message("🔴 Spotikey is shutting down...")
+        shutdown_flush()
         icon.stop()
         os._exit(0)
+    import pystray
     image = load_icon()
     menu = pystray.Menu(
         pystray.MenuItem('Open Spotikey', open_gui),
+        pystray.MenuItem('Like Current Album', lambda icon, item: like_current_album()),
+        pystray.MenuItem('Like Queue', lambda icon, item: like_queue()),
+        pystray.MenuItem('Like Recently Played', lambda icon, item: like_recently_played()),
+        pystray.MenuItem('Cancel Bulk Like', lambda icon, item: cancel_bulk_like(),
+                         visible=lambda item: bulk_running()),
+        pystray.MenuItem('Export Like History', lambda icon, item: SCHEDULER.submit(export_history),
+                         visible=lambda item: ENGINE.history is not None),
         pystray.MenuItem('Check for Updates', lambda icon, item: manual_update_check()),
+        pystray.MenuItem('Save Metrics', lambda icon, item: dump_metrics(),
+                         visible=lambda item: STORE.get("metrics_enabled", False)),
+        pystray.MenuItem('Diagnostics', pystray.Menu(
+            pystray.MenuItem('Start Profiling', lambda icon, item: start_profiling(),
+                             visible=lambda item: not profiling()),
+            pystray.MenuItem('Stop Profiling', lambda icon, item: SCHEDULER.submit(stop_profiling),
+                             visible=lambda item: profiling()),
+            pystray.MenuItem('Take Heap Snapshot', lambda icon, item: SCHEDULER.submit(take_heap_snapshot)),
+            pystray.MenuItem('Stop Allocation Tracing', lambda icon, item: ENGINE.stop_heap(),
+                             visible=lambda item: tracing_allocations()),
+            pystray.MenuItem('Open Reports Folder', lambda icon, item: open_reports_folder())
+        )),
         pystray.MenuItem('Exit', exit_app)
     )
     tray_icon = pystray.Icon(APP_NAME, image, APP_NAME, menu)
+    STARTUP.mark("tray icon created")
     tray_icon.run()
 
 # === HOTKEY ===
 def rebind_hotkey():
-    global current_hotkey
-    if current_hotkey:
-        keyboard.remove_hotkey(current_hotkey)
-    data = load_data()
-    hotkey = data.get("hotkey", "ctrl+alt+l")
-    current_hotkey = keyboard.add_hotkey(hotkey, like_current_song)
-    log_message(f"Hotkey set to {hotkey}")
+    """Bind the like hotkey, the extra "hotkeys" actions (playlists, bulk likes) and the prefetch prefix."""
+    for handle in current_hotkeys:
+        keyboard.remove_hotkey(handle)
+    current_hotkeys.clear()
+    hotkey = STORE.get("hotkey", "ctrl+alt+l")
+    for combo, callback in ENGINE.hotkey_actions().items():
+        current_hotkeys.append(keyboard.add_hotkey(combo, like_current_song if combo == hotkey else callback))
+    prefix = hotkey_prefix(hotkey)
+    if prefix and STORE.get("speculative_prefetch", False):
+        # Look up the playing track while the final key of the chord is still on its way.
+        current_hotkeys.append(keyboard.add_hotkey(prefix, ENGINE.speculate))
+    extra = len(current_hotkeys) - 1
+    log_message(f"Hotkey set to {hotkey}" + (f" (+{extra} more)" if extra else ""))
 
 def start_hotkey_listener():
     keyboard.wait()
 
 # === MAIN ===
-def start_tray_mode():
-    global main_window
-    if 'main_window' not in globals() or main_window is None:
-        main_window = None
+def start_ipc():
+    """Let scripts and other devices drive this instance (python -m spotikey_core.daemon send like)."""
+    global COMMAND_SERVER
+    try:
+        COMMAND_SERVER = start_command_server(ENGINE)
+    except OSError as e:
+        print(f"[WARN] Command socket unavailable: {e}")
+
+def shutdown_flush():
+    if COMMAND_SERVER:
+        COMMAND_SERVER.stop()
+    ENGINE.flush()
+
+def shutdown():
+    shutdown_flush()
+    os._exit(0)
+
+def start_services():
+    """Arm the hotkey and start the engine, command socket and tray icon (once)."""
+    global SERVICES_STARTED
+    if SERVICES_STARTED:
+        return
+    SERVICES_STARTED = True
+    ACTIONS.start()
     rebind_hotkey()
+    STORE.subscribe(lambda changed: rebind_hotkey(), keys=("hotkey", "hotkeys", "speculative_prefetch"))
+    STARTUP.mark("hotkey ready")
+    report_startup_profile()
+    ENGINE.start()
+    start_ipc()
+    if STORE.get("metrics_enabled", False):
+        ensure_flask()
     threading.Thread(target=start_hotkey_listener, daemon=True).start()
     log_message(f"🎵 {APP_NAME} v{APP_VERSION} is running in tray.")
-    icon_thread = threading.Thread(target=create_tray_icon, daemon=False)
-    icon_thread.start()
-    while True:
-        try:
-            gui_queue.get(timeout=1)
-            if main_window:
-                main_window.show_window()
-            else:
-                main_window = SpotikeyMain()
-                main_window.mainloop()
-        except queue.Empty:
-            pass
+    threading.Thread(target=create_tray_icon, daemon=False).start()
 
-def main():
-    global LOG_MESSAGES, main_window, LATEST_VERSION
-    signal.signal(signal.SIGINT, lambda sig, frame: os._exit(0))
-    signal.signal(signal.SIGTERM, lambda sig, frame: os._exit(0))
+def start_tray_mode():
+    start_services()
+    run_ui_loop()
 
-    LOG_MESSAGES = load_log()
-    data = load_data()
+def authorise_and_start():
+    """Run the login from the Authorise window; on first run, a success brings up the tray."""
+    if authenticate_spotify() and not SERVICES_STARTED:
+        log_message("✅ First-time setup complete. Spotikey is now running in the tray.")
+        start_services()
 
-    # Check for updates at startup
-    LATEST_VERSION = check_for_update()
-    if LATEST_VERSION:
-        prompt_update(LATEST_VERSION)
+def report_startup_profile():
+    if not STARTUP.enabled:
+        return
+    report = STARTUP.report()
+    log_message("⏱ Startup profile (time to hotkey ready):\n" + report)
+    try:
+        with open(STARTUP_PROFILE_FILE, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    except OSError as e:
+        print(f"[WARN] Could not write startup profile: {e}")
+
+def main():
+    signal.signal(signal.SIGINT, lambda sig, frame: shutdown())
+    signal.signal(signal.SIGTERM, lambda sig, frame: shutdown())
+
+    ENGINE.start_logging()
+    # Diagnose a slow or growing install without a rebuild: Spotikey.exe --profile / --trace-malloc.
+    if "--profile" in sys.argv:
+        start_profiling()
+    if "--trace-malloc" in sys.argv:
+        take_heap_snapshot()
+    data = load_data()
+    STARTUP.mark("settings loaded")
+
+    # Check for updates in the background; the result is logged and shown in the window
+    SCHEDULER.submit(background_update_check)
+
+    token_info = data.get("token_info") or {}
+    if data["client_id"] and token_info.get("refresh_token"):
+        # Arm the hotkey straight away; an expired token refreshes in the background
+        # and the first press waits on that refresh rather than blocking startup.
+        TOKENS.set_token(token_info)
+        if TOKENS.is_valid():
+            log_message("✅ Existing token is still valid.")
+        else:
+            log_message("🔄 Refreshing token in the background...")
+        STARTUP.mark("token scheduled")
+        start_tray_mode()
+        return
 
     token_valid = authenticate_spotify()
-    if not data["client_id"] or not data["client_secret"] or not token_valid:
+    if not data["client_id"] or not token_valid:
         messagebox.showinfo(APP_NAME, "Welcome to Spotikey! Please Authorise your Spotify account.\nUse the '?' button in the top right for instructions.")
         log_message("⚙ Please Authorise the app.")
-        main_window = SpotikeyMain()
-        main_window.mainloop()
-        data = load_data()
-        if data["client_id"] and data["client_secret"]:
-            token_valid = authenticate_spotify()
-            if token_valid:
-                log_message("✅ First-time setup complete. Hiding Spotikey to tray...")
-                start_tray_mode()
+        # Authorising from the window starts the tray services (authorise_and_start).
+        UI_QUEUE.put((open_window, ()))
+        run_ui_loop()
         return
-    if authenticate_spotify():
-        start_tray_mode()
+    start_tray_mode()
 
 if __name__ == "__main__":
     main()
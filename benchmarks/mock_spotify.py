@@ -0,0 +1,238 @@
+"""Local stand-in for api.spotify.com and accounts.spotify.com.
+
+Serves both hosts from one HTTP/1.1 keep-alive server: the Web API under
+/v1 and the accounts token endpoint at /api/token. Latency, 429 injection
+and token lifetime are configurable, and every request is counted so a
+benchmark can report requests per press.
+"""
+import json
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class MockConfig:
+    def __init__(self, latency_ms=20.0, token_ttl=3600, rate_limit_every=0, retry_after=1,
+                 library_size=0, rotate_tracks=True, track_ms=180000, album_size=12, queue_size=20,
+                 playlists=3, playlist_size=120):
+        self.latency_ms = latency_ms
+        self.token_ttl = token_ttl
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.library_size = library_size
+        self.rotate_tracks = rotate_tracks
+        self.track_ms = track_ms
+        self.album_size = album_size
+        self.queue_size = queue_size
+        self.playlists = playlists
+        self.playlist_size = playlist_size
+
+
+class MockSpotify:
+    """Runs the mock server on a background thread; use as a context manager."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.counts = Counter()
+        self.saved = set()
+        self.tokens = {}
+        self.playlists = {f"pl{i:04d}": {"name": f"Mock Playlist {i}", "version": 1,
+                                          "tracks": [f"pltrack{i:02d}{j:05d}" for j in range(self.config.playlist_size)]}
+                          for i in range(self.config.playlists)}
+        self._lock = threading.Lock()
+        self._track_seq = 0
+        self._requests = 0
+        self.server = _Server((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self):
+        return self.base_url + "/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+
+    def issue_token(self, ttl=None):
+        token = secrets.token_hex(8)
+        ttl = self.config.token_ttl if ttl is None else ttl
+        with self._lock:
+            self.tokens[token] = time.time() + ttl
+        return {"access_token": token, "token_type": "Bearer", "expires_in": ttl,
+                "refresh_token": "mock-refresh", "scope": "user-library-modify"}
+
+    # === REQUEST HANDLING ===
+    def handle(self, method, path, query, headers, body):
+        with self._lock:
+            self.counts[f"{method} {path}"] += 1
+            self._requests += 1
+            seq = self._requests
+        if self.config.latency_ms:
+            time.sleep(self.config.latency_ms / 1000.0)
+        every = self.config.rate_limit_every
+        if every and seq % every == 0:
+            with self._lock:
+                self.counts["429"] += 1
+            return 429, {"error": {"status": 429, "message": "API rate limit exceeded"}}, \
+                {"Retry-After": str(self.config.retry_after)}
+
+        if path == "/api/token" and method == "POST":
+            return 200, self.issue_token(), {}
+        if not path.startswith("/v1"):
+            return 404, {"error": "not found"}, {}
+        if not self._authorised(headers):
+            with self._lock:
+                self.counts["401"] += 1
+            return 401, {"error": {"status": 401, "message": "The access token expired"}}, {}
+
+        if path == "/v1/me/player/currently-playing" and method == "GET":
+            return 200, self._now_playing(), {}
+        if path == "/v1/me/tracks" and method in ("PUT", "DELETE"):
+            ids = json.loads(body or b"{}").get("ids", [])
+            with self._lock:
+                if method == "PUT":
+                    self.saved.update(ids)
+                else:
+                    self.saved.difference_update(ids)
+            return 200, None, {}
+        if path == "/v1/me/tracks" and method == "GET":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["20"])[0])
+            total = self.config.library_size
+            items = [{"added_at": "2024-01-01T00:00:00Z", "track": {"id": f"lib{i:06d}", "name": f"Library {i}"}}
+                     for i in range(offset, min(total, offset + limit))]
+            return 200, {"items": items, "total": total, "offset": offset, "limit": limit}, {}
+        if path == "/v1/me/tracks/contains" and method == "GET":
+            ids = query.get("ids", [""])[0].split(",")
+            with self._lock:
+                return 200, [track_id in self.saved for track_id in ids], {}
+        if path.startswith("/v1/albums/") and path.endswith("/tracks") and method == "GET":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["20"])[0])
+            total = self.config.album_size
+            items = [_track(f"alb{i:06d}") for i in range(offset, min(total, offset + limit))]
+            return 200, {"items": items, "total": total, "offset": offset, "limit": limit}, {}
+        if path == "/v1/me/player/queue" and method == "GET":
+            return 200, {"currently_playing": self._now_playing()["item"],
+                         "queue": [_track(f"queue{i:04d}") for i in range(self.config.queue_size)]}, {}
+        if path == "/v1/me/player/recently-played" and method == "GET":
+            limit = int(query.get("limit", ["20"])[0])
+            return 200, {"items": [{"track": _track(f"recent{i % 30:04d}")} for i in range(limit)]}, {}
+        if path == "/v1/me/playlists" and method == "GET":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["20"])[0])
+            with self._lock:
+                ordered = list(self.playlists.items())
+                items = [{"id": pid, "name": playlist["name"], "snapshot_id": f"{pid}-v{playlist['version']}"}
+                         for pid, playlist in ordered[offset:offset + limit]]
+            return 200, {"items": items, "total": len(ordered), "offset": offset, "limit": limit}, {}
+        if path.startswith("/v1/playlists/") and path.endswith("/tracks"):
+            return self._playlist_tracks(method, path.split("/")[3], query, body)
+        return 404, {"error": {"status": 404, "message": "Service not found"}}, {}
+
+    def _playlist_tracks(self, method, pid, query, body):
+        with self._lock:
+            playlist = self.playlists.get(pid)
+            if playlist is None:
+                return 404, {"error": {"status": 404, "message": "Invalid playlist Id"}}, {}
+            if method == "GET":
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", ["100"])[0])
+                tracks = playlist["tracks"]
+                items = [{"track": _track(track_id)} for track_id in tracks[offset:offset + limit]]
+                return 200, {"items": items, "total": len(tracks), "offset": offset, "limit": limit}, {}
+            payload = json.loads(body or b"{}")
+            if method == "POST":
+                playlist["tracks"].extend(uri.rsplit(":", 1)[-1] for uri in payload.get("uris", []))
+                status = 201
+            elif method == "DELETE":
+                removed = {item["uri"].rsplit(":", 1)[-1] for item in payload.get("tracks", [])}
+                playlist["tracks"] = [track_id for track_id in playlist["tracks"] if track_id not in removed]
+                status = 200
+            else:
+                return 405, {"error": {"status": 405, "message": "Method not allowed"}}, {}
+            playlist["version"] += 1
+            return status, {"snapshot_id": f"{pid}-v{playlist['version']}"}, {}
+
+    def _authorised(self, headers):
+        auth = headers.get("Authorization", "")
+        token = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+        with self._lock:
+            expires_at = self.tokens.get(token)
+        return expires_at is not None and expires_at > time.time()
+
+    def _now_playing(self):
+        with self._lock:
+            if self.config.rotate_tracks:
+                self._track_seq += 1
+            seq = self._track_seq
+        return {
+            "is_playing": True,
+            "progress_ms": 1000,
+            "currently_playing_type": "track",
+            "item": {"id": f"track{seq:06d}", "name": f"Mock Track {seq}", "duration_ms": self.config.track_ms,
+                     "type": "track", "artists": [{"name": "Mock Artist"}],
+                     "album": {"id": "album000001", "name": "Mock Album"}},
+        }
+
+
+def _track(track_id):
+    return {"id": track_id, "name": track_id, "type": "track"}
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops SYNs (1 s retransmit) once many clients connect at once.
+    request_queue_size = 256
+
+
+def _make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _dispatch(self):
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, payload, extra = mock.handle(self.command, parts.path, parse_qs(parts.query), self.headers, body)
+            data = b"" if payload is None else json.dumps(payload).encode()
+            self.send_response(status)
+            if data:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in extra.items():
+                self.send_header(key, value)
+            self.end_headers()
+            if data and self.command != "HEAD":
+                self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+    return Handler
@@ -0,0 +1,610 @@
+"""Spotikey benchmark suite.
+
+Drives the headless engine from spotikey_core.engine (the same one the
+tray app runs) against the local mock server in mock_spotify.py, either
+directly or over the IPC command socket, and reports press-to-confirmation latency percentiles, requests per press,
+toasts shown (through a recording notification backend) and memory growth.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenarios single,burst --latency-ms 40 --json results.json
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_spotify import MockConfig, MockSpotify  # noqa: E402
+
+SCENARIOS = ("single", "prefetch", "burst", "expired", "ratelimited", "ipc", "bulk", "playlist", "multi", "soak", "tray")
+
+
+# === HARNESS ===
+class Confirmations:
+    """Timestamps of every confirmed library write, fed from the app's callbacks."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.times = []
+        self.failures = 0
+
+    def confirmed(self, count):
+        with self.cond:
+            self.times.extend([time.perf_counter()] * count)
+            self.cond.notify_all()
+
+    def failed(self):
+        with self.cond:
+            self.failures += 1
+            self.cond.notify_all()
+
+    def wait_for(self, count, timeout):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while len(self.times) + self.failures < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def reset(self):
+        with self.cond:
+            self.times, self.failures = [], 0
+
+
+def load_app(mock, workdir, rate_limit):
+    """Start an engine on a throwaway data folder seeded to talk to the mock."""
+    from spotikey_core.engine import Engine
+    from spotikey_core.notifications import RecordingBackend
+    token = mock.issue_token()
+    token["expires_at"] = int(time.time()) + token["expires_in"]
+    data = {
+        "client_id": "bench", "client_secret": "bench", "notifications": True,
+        "token_info": token, "library_index": False,
+        "api_base_url": mock.api_base, "accounts_base_url": mock.base_url,
+        "api_rate_limit": rate_limit, "api_rate_burst": max(1, int(rate_limit)),
+    }
+    with open(os.path.join(workdir, "spotikey_data.json"), "w") as f:
+        json.dump(data, f)
+    engine = Engine(workdir, notifier_backend=RecordingBackend())
+    engine.load_token()
+    engine.spotify.prewarm()
+    engine.start()
+    return engine
+
+
+def hook_confirmations(app, confirmations):
+    from spotikey_core.outbox import QueuedForRetry
+    saved, error, sent = app.actions.on_saved, app.actions.on_error, app.outbox.on_sent
+
+    def on_saved(tracks):
+        saved(tracks)
+        confirmations.confirmed(len(tracks))
+
+    def on_error(tracks, e):
+        error(tracks, e)
+        if not isinstance(e, QueuedForRetry):
+            confirmations.failed()
+
+    def on_sent(op, ids):
+        sent(op, ids)
+        confirmations.confirmed(len(ids))
+
+    app.actions.on_saved = on_saved
+    app.actions.on_error = on_error
+    app.outbox.on_sent = on_sent
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+
+def press_latencies(press_times, confirm_times):
+    """Latency of each press = time until the first confirmation that follows it."""
+    confirm_times = sorted(confirm_times)
+    latencies = []
+    for pressed in press_times:
+        i = bisect.bisect_left(confirm_times, pressed)
+        if i < len(confirm_times):
+            latencies.append(confirm_times[i] - pressed)
+    return latencies
+
+
+def summarise(name, press_times, confirmations, mock, extra=None):
+    latencies = [x * 1000 for x in press_latencies(press_times, confirmations.times)]
+    requests = sum(n for key, n in mock.counts.items() if " " in key)
+    result = {
+        "scenario": name,
+        "presses": len(press_times),
+        "confirmed": len(confirmations.times),
+        "failed": confirmations.failures,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "requests": requests,
+        "requests_per_press": requests / len(press_times) if press_times else 0.0,
+        "http_429": mock.counts.get("429", 0),
+        "requests_by_endpoint": {k: v for k, v in mock.counts.items() if " " in k},
+    }
+    result.update(extra or {})
+    return result
+
+
+def begin(mock, confirmations, config=None):
+    if config:
+        mock.config.__dict__.update(config)
+    mock.reset_counts()
+    confirmations.reset()
+
+
+# === SCENARIOS ===
+def run_single(app, mock, confirmations, args):
+    begin(mock, confirmations)
+    press_times = []
+    for _ in range(args.presses):
+        before = len(confirmations.times) + confirmations.failures
+        press_times.append(time.perf_counter())
+        app.press()
+        confirmations.wait_for(before + 1, args.timeout)
+        time.sleep(app.actions.window)
+    return summarise("single", press_times, confirmations, mock)
+
+
+def run_prefetch(app, mock, confirmations, args):
+    """Speculative mode: modifiers down, then the final key `chord_gap_ms` later; latency is from the final key.
+
+    Afterwards `shortcuts` modifier presses with no final key show how many the cap absorbs.
+    """
+    begin(mock, confirmations)
+    app.store.set("speculative_prefetch", True)
+    prefetch = app.prefetch
+    per_minute, ttl = prefetch.per_minute, prefetch.ttl
+    prefetch.per_minute = args.presses  # one chord per press, well inside a real user's pace
+    press_times = []
+    try:
+        for _ in range(args.presses):
+            before = len(confirmations.times) + confirmations.failures
+            app.speculate()
+            time.sleep(args.chord_gap_ms / 1000.0)
+            press_times.append(time.perf_counter())
+            app.press()
+            confirmations.wait_for(before + 1, args.timeout)
+            time.sleep(app.actions.window)
+        prefetch.per_minute, prefetch.ttl = per_minute, 0.01
+        prefetch._recent.clear()
+        for _ in range(args.shortcuts):
+            app.speculate()
+            time.sleep(0.02)
+        stats = prefetch.stats()
+    finally:
+        prefetch.per_minute, prefetch.ttl = per_minute, ttl
+        app.store.set("speculative_prefetch", False)
+    return summarise("prefetch", press_times, confirmations, mock, {
+        "chord_gap_ms": args.chord_gap_ms,
+        "shortcuts": args.shortcuts,
+        "prefetch": stats,
+    })
+
+
+def run_burst(app, mock, confirmations, args):
+    begin(mock, confirmations)
+    press_times = []
+    for _ in range(args.bursts):
+        before = len(confirmations.times) + confirmations.failures
+        for _ in range(args.burst_size):
+            press_times.append(time.perf_counter())
+            app.press()
+            time.sleep(args.burst_gap_ms / 1000.0)
+        confirmations.wait_for(before + 1, args.timeout)
+        time.sleep(app.actions.window * 2)
+    return summarise("burst", press_times, confirmations, mock,
+                     {"burst_size": args.burst_size, "burst_gap_ms": args.burst_gap_ms})
+
+
+def run_expired(app, mock, confirmations, args):
+    begin(mock, confirmations)
+    press_times = []
+    for _ in range(args.presses):
+        info = dict(app.tokens.token_info)
+        info["expires_at"] = int(time.time()) - 1
+        app.tokens.token_info = info
+        before = len(confirmations.times) + confirmations.failures
+        press_times.append(time.perf_counter())
+        app.press()
+        confirmations.wait_for(before + 1, args.timeout)
+        time.sleep(app.actions.window)
+    return summarise("expired", press_times, confirmations, mock)
+
+
+def run_ratelimited(app, mock, confirmations, args):
+    begin(mock, confirmations, {"rate_limit_every": args.rate_limit_every, "retry_after": 1})
+    press_times = []
+    try:
+        for _ in range(args.presses):
+            before = len(confirmations.times) + confirmations.failures
+            press_times.append(time.perf_counter())
+            app.press()
+            confirmations.wait_for(before + 1, args.timeout)
+            time.sleep(app.actions.window)
+        deadline = time.monotonic() + args.timeout
+        while app.outbox.pending() and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        mock.config.rate_limit_every = 0
+    return summarise("ratelimited", press_times, confirmations, mock,
+                     {"rate_limit_every": args.rate_limit_every, "outbox_left": app.outbox.pending()})
+
+
+def run_ipc(app, mock, confirmations, args):
+    """Presses sent the way an external script would: one connection per command."""
+    from spotikey_core.ipc import ipc_endpoint, start_command_server
+    from spotikey_core.ipc import send_command
+    server = start_command_server(app)
+    address, authkey = ipc_endpoint(app.appdata_dir)
+    begin(mock, confirmations)
+    press_times = []
+    try:
+        for _ in range(args.presses):
+            before = len(confirmations.times) + confirmations.failures
+            press_times.append(time.perf_counter())
+            send_command(address, authkey, "like")
+            confirmations.wait_for(before + 1, args.timeout)
+            time.sleep(app.actions.window)
+    finally:
+        server.stop()
+    return summarise("ipc", press_times, confirmations, mock)
+
+
+def run_bulk(app, mock, confirmations, args):
+    """One bulk like per source; a third of the album is already saved. A "press" here is a whole job."""
+    begin(mock, confirmations, {"album_size": args.album_size})
+    with mock._lock:
+        mock.saved.update(f"alb{i:06d}" for i in range(0, args.album_size, 3))
+    durations, failures, saved = [], 0, 0
+    for source in ("album", "queue", "recent"):
+        started = time.perf_counter()
+        app.like_bulk(source)
+        app.bulk.wait(args.timeout)
+        durations.append((time.perf_counter() - started) * 1000)
+        failures += app.bulk.state != "done"
+        saved += app.bulk.saved + app.bulk.queued
+    requests = sum(n for key, n in mock.counts.items() if " " in key)
+    return {
+        "scenario": "bulk",
+        "presses": len(durations),
+        "confirmed": len(durations) - failures,
+        "failed": failures,
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+        "p99_ms": percentile(durations, 99),
+        "max_ms": max(durations, default=0.0),
+        "requests": requests,
+        "requests_per_press": requests / len(durations),
+        "http_429": mock.counts.get("429", 0),
+        "requests_by_endpoint": {k: v for k, v in mock.counts.items() if " " in k},
+        "album_size": args.album_size,
+        "tracks_saved": saved,
+    }
+
+
+def run_playlist(app, mock, confirmations, args):
+    """Playlist-add presses by name, each for a new track; the first one also loads the directory and track ids."""
+    begin(mock, confirmations, {"playlist_size": args.playlist_size})
+    durations, failures, cold_requests = [], 0, 0
+    target = "Mock Playlist 1"
+    for i in range(args.presses):
+        started = time.perf_counter()
+        result = app.playlist_action("add", target)
+        durations.append((time.perf_counter() - started) * 1000)
+        failures += not result.get("done")
+        if i == 0:
+            cold_requests = sum(n for key, n in mock.counts.items() if " " in key)
+    requests = sum(n for key, n in mock.counts.items() if " " in key)
+    warm = len(durations) - 1
+    return {
+        "scenario": "playlist",
+        "presses": len(durations),
+        "confirmed": len(durations) - failures,
+        "failed": failures,
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+        "p99_ms": percentile(durations, 99),
+        "max_ms": max(durations, default=0.0),
+        "requests": requests,
+        "requests_per_press": requests / len(durations),
+        "http_429": mock.counts.get("429", 0),
+        "requests_by_endpoint": {k: v for k, v in mock.counts.items() if " " in k},
+        "playlist_size": args.playlist_size,
+        "cold_requests": cold_requests,
+        "warm_requests_per_press": (requests - cold_requests) / warm if warm else 0.0,
+    }
+
+
+def run_multi(app, mock, confirmations, args):
+    """Concurrent presses across N accounts sharing one async connection pool; one row per N."""
+    return [asyncio.run(multi_round(mock, int(count), args)) for count in args.account_counts.split(",")]
+
+
+async def multi_round(mock, count, args):
+    from spotikey_core.multi import MultiAccountEngine
+    begin(mock, Confirmations())
+    pressed, latencies, failures = {}, [], []
+    done = asyncio.Event()
+
+    def on_result(account_id, outcome, detail):
+        latencies.append((time.perf_counter() - pressed[account_id]) * 1000)
+        if outcome == "error":
+            failures.append(detail)
+        if len(latencies) >= expected:
+            done.set()
+
+    engine = MultiAccountEngine(mock.api_base, mock.base_url, pool_size=args.pool_size, on_result=on_result)
+    tracemalloc.start()
+    start_current, _ = tracemalloc.get_traced_memory()
+    for i in range(count):
+        token = mock.issue_token()
+        token["expires_at"] = int(time.time()) + token["expires_in"]
+        engine.add_account(f"account{i}", "bench", "bench", token, rate=args.rate_limit, burst=max(1, int(args.rate_limit)))
+    per_account = (tracemalloc.get_traced_memory()[0] - start_current) / count
+    tracemalloc.stop()
+    await engine.start()
+    try:
+        for round_no in range(args.multi_rounds):
+            expected = count * (round_no + 1)
+            done.clear()
+            for account_id in engine.accounts:
+                pressed[account_id] = time.perf_counter()
+                engine.press(account_id)
+            try:
+                await asyncio.wait_for(done.wait(), args.timeout)
+            except asyncio.TimeoutError:
+                break
+    finally:
+        await engine.close()
+    presses = count * args.multi_rounds
+    requests = sum(n for key, n in mock.counts.items() if " " in key)
+    return {
+        "scenario": f"multi-{count}",
+        "presses": presses,
+        "confirmed": len(latencies) - len(failures),
+        "failed": len(failures),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "requests": requests,
+        "requests_per_press": requests / presses if presses else 0.0,
+        "http_429": mock.counts.get("429", 0),
+        "requests_by_endpoint": {k: v for k, v in mock.counts.items() if " " in k},
+        "accounts": count,
+        "pool_size": args.pool_size,
+        "memory_per_account_kb": per_account / 1024,
+    }
+
+
+def run_soak(app, mock, confirmations, args):
+    begin(mock, confirmations)
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    start_current, _ = tracemalloc.get_traced_memory()
+    press_times = []
+    deadline = time.monotonic() + args.soak_seconds
+    while time.monotonic() < deadline:
+        before = len(confirmations.times) + confirmations.failures
+        press_times.append(time.perf_counter())
+        app.press()
+        confirmations.wait_for(before + 1, args.timeout)
+        time.sleep(args.soak_interval)
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:5]
+    tracemalloc.stop()
+    return summarise("soak", press_times, confirmations, mock, {
+        "memory_growth_kb": (current - start_current) / 1024,
+        "memory_peak_kb": peak / 1024,
+        "top_growth": [str(stat) for stat in top],
+    })
+
+
+def rss_kb():
+    """Resident set size from /proc (Linux) or psutil if installed; None when neither is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024
+
+
+def run_tray(app, mock, confirmations, args):
+    """A day of presses with the window closed: memory allocated by spotikey_core, sampled after gc.
+
+    Tracing starts before a warm-up that cycles the bounded in-memory log ring, so ring slots
+    being reused don't show up as growth. Allocations made by the mock server and this harness
+    are filtered out.
+    """
+    begin(mock, confirmations)
+    checkpoints = 10
+    step = max(1, args.day_presses // checkpoints)
+    app_filter = [tracemalloc.Filter(True, os.path.join("*", "spotikey_core", "*"))]
+    press_times = []
+
+    def presses(count):
+        for _ in range(count):
+            before = len(confirmations.times) + confirmations.failures
+            press_times.append(time.perf_counter())
+            app.press()
+            confirmations.wait_for(before + 1, args.timeout)
+
+    tracemalloc.start()
+    presses(max(step, app.logbook.recent.maxlen))
+    gc.collect()
+    samples, rss = [], [rss_kb()]
+    for _ in range(checkpoints):
+        presses(step)
+        app.history.flush()
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(app_filter)
+        samples.append(sum(stat.size for stat in snapshot.statistics("filename")) / 1024)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss.append(rss_kb())
+    growth = samples[-1] - samples[0]
+    return summarise("tray", press_times, confirmations, mock, {
+        "tray_samples_kb": samples,
+        "tray_growth_kb": growth,
+        "tray_growth_per_1000_kb": growth / (step * (checkpoints - 1)) * 1000,
+        "tray_peak_kb": peak / 1024,  # everything traced, mock and harness included
+        "rss_kb": rss,
+    })
+
+
+RUNNERS = {
+    "single": run_single,
+    "prefetch": run_prefetch,
+    "burst": run_burst,
+    "expired": run_expired,
+    "ratelimited": run_ratelimited,
+    "ipc": run_ipc,
+    "bulk": run_bulk,
+    "playlist": run_playlist,
+    "multi": run_multi,
+    "soak": run_soak,
+    "tray": run_tray,
+}
+
+
+# === REPORT ===
+def print_report(results):
+    header = f"{'scenario':<12}{'presses':>8}{'ok':>6}{'fail':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/press':>11}{'429s':>6}{'toasts':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<12}{r['presses']:>8}{r['confirmed']:>6}{r['failed']:>6}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['requests_per_press']:>11.2f}{r['http_429']:>6}{r.get('toasts', 0):>8}")
+    for r in results:
+        if "prefetch" in r:
+            s = r["prefetch"]
+            print(f"\n{r['scenario']}: final key {r['chord_gap_ms']:.0f} ms after the modifiers; "
+                  f"{s['hits']} hits, {s['misses']} misses, {s['wasted']} wasted, "
+                  f"{s['capped']} of {r['shortcuts']} unrelated shortcuts capped")
+        if "tracks_saved" in r:
+            print(f"\n{r['scenario']}: album of {r['album_size']}, queue and recently played; "
+                  f"{r['tracks_saved']} tracks saved in {r['requests']} requests")
+            for endpoint, count in sorted(r["requests_by_endpoint"].items()):
+                print(f"  {endpoint}: {count}")
+        if "cold_requests" in r:
+            print(f"\n{r['scenario']}: playlist of {r['playlist_size']}; first press {r['cold_requests']} requests, "
+                  f"then {r['warm_requests_per_press']:.2f} per press")
+    multi = [r for r in results if "memory_per_account_kb" in r]
+    if multi:
+        print()
+    for r in multi:
+        print(f"{r['scenario']}: {r['accounts']} accounts on a pool of {r['pool_size']}, "
+              f"{r['memory_per_account_kb']:.2f} KiB per account")
+    for r in results:
+        if "tray_samples_kb" in r:
+            samples = ", ".join(f"{kb:.0f}" for kb in r["tray_samples_kb"])
+            print(f"\n{r['scenario']}: traced KiB at each tenth of the run: {samples}")
+            print(f"  growth {r['tray_growth_kb']:.1f} KiB ({r['tray_growth_per_1000_kb']:.1f} KiB per 1000 presses), "
+                  f"peak {r['tray_peak_kb']:.1f} KiB")
+            if None not in r["rss_kb"]:
+                print(f"  RSS {r['rss_kb'][0]:.0f} -> {r['rss_kb'][1]:.0f} KiB")
+        if "memory_growth_kb" in r:
+            print(f"\n{r['scenario']}: memory growth {r['memory_growth_kb']:.1f} KiB, peak {r['memory_peak_kb']:.1f} KiB")
+            for line in r["top_growth"]:
+                print(f"  {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Spotikey against a local mock Spotify server.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mock server latency per request")
+    parser.add_argument("--presses", type=int, default=30)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--burst-gap-ms", type=float, default=20.0)
+    parser.add_argument("--rate-limit-every", type=int, default=4, help="inject a 429 every Nth request")
+    parser.add_argument("--chord-gap-ms", type=float, default=60.0,
+                        help="prefetch: time between the modifiers and the final key")
+    parser.add_argument("--shortcuts", type=int, default=20,
+                        help="prefetch: unrelated modifier presses fired after the run")
+    parser.add_argument("--album-size", type=int, default=300, help="bulk: tracks on the mock album")
+    parser.add_argument("--playlist-size", type=int, default=120, help="playlist: tracks already on each playlist")
+    parser.add_argument("--account-counts", default="1,10,100", help="multi: comma-separated account counts")
+    parser.add_argument("--multi-rounds", type=int, default=5, help="multi: presses per account")
+    parser.add_argument("--pool-size", type=int, default=64, help="multi: shared connection pool size")
+    parser.add_argument("--day-presses", type=int, default=500, help="tray: presses in the simulated day")
+    parser.add_argument("--soak-seconds", type=float, default=60.0)
+    parser.add_argument("--soak-interval", type=float, default=0.5)
+    parser.add_argument("--rate-limit", type=float, default=1000.0,
+                        help="client-side api_rate_limit (requests/s) used during the run")
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show Spotikey's own log output")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="sample every thread during the run and copy the .prof/.folded reports to DIR")
+    args = parser.parse_args(argv)
+
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in selected if s not in RUNNERS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = []
+    with MockSpotify(MockConfig(latency_ms=args.latency_ms)) as mock, \
+            tempfile.TemporaryDirectory(prefix="spotikey-bench-") as workdir:
+        with contextlib.ExitStack() as quiet:
+            if not args.verbose:
+                # Not a StringIO: that keeps every string written to it, which would look like a leak in "tray".
+                quiet.enter_context(contextlib.redirect_stdout(quiet.enter_context(open(os.devnull, "w"))))
+            app = load_app(mock, workdir, args.rate_limit)
+            confirmations = Confirmations()
+            hook_confirmations(app, confirmations)
+            if args.profile:
+                app.start_profile()
+            for name in selected:
+                shown_before = app.notifier.backend.count
+                rows = RUNNERS[name](app, mock, confirmations, args)
+                app.notifier.flush()
+                rows = rows if isinstance(rows, list) else [rows]
+                rows[0]["toasts"] = app.notifier.backend.count - shown_before
+                results.extend(rows)
+            profile = app.stop_profile() if args.profile else None
+            if profile:
+                os.makedirs(args.profile, exist_ok=True)
+                profile = {key: shutil.copy(profile[key], args.profile) for key in ("pstats", "collapsed")}
+            app.flush()  # pending debounced writes, before the temporary data folder goes away
+
+    print_report(results)
+    if profile:
+        print(f"\nprofile: {profile['pstats']}, {profile['collapsed']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Platform-neutral building blocks used by Spotikey.py."""
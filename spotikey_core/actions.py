@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from spotikey_core.metrics import METRICS
+
+MAX_IDS_PER_REQUEST = 50
+
+LIKE_CURRENT = "like_current"
+LIKE_IDS = "like_ids"
+
+
+class ActionQueue:
+    """Worker pipeline between the hotkey hook and the Spotify library calls.
+
+    Presses are queued and the hook returns immediately. The worker takes
+    everything queued (waiting up to `window` seconds for more), resolves the
+    playing track once for all of those presses, drops ids it liked within
+    `dedupe_ttl` seconds and sends the rest in PUT /me/tracks batches of 50.
+    Presses made while the previous lookup was still in flight reuse the
+    track it found instead of resolving it again, and go through the same
+    steps as any other press (so a toggle press undoes the like before it).
+    If that lookup failed or found nothing, they resolve the track again.
+    Ids skipped as recently liked are reported through on_skipped, so no
+    press ends without a callback.
+
+    Tracks handed to on_saved/on_removed carry "pressed_at", the
+    perf_counter() time of the earliest press or like() call behind them.
+
+    A `library` index, when attached, only decides toggles: a pressed track
+    it holds is removed again when `toggle()` returns True. Plain likes are
+    always sent (PUT /me/tracks is idempotent), since the index can be stale.
+    """
+
+    def __init__(self, resolve_current, save_tracks, on_saved, on_error,
+                 on_overflow=None, window=0.0, dedupe_ttl=10.0, max_depth=64,
+                 library=None, remove_tracks=None, on_removed=None, on_skipped=None, toggle=None):
+        self.resolve_current = resolve_current
+        self.save_tracks = save_tracks
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self.on_overflow = on_overflow
+        self.library = library
+        self.remove_tracks = remove_tracks
+        self.on_removed = on_removed
+        self.on_skipped = on_skipped
+        self.toggle = toggle
+        self.window = window
+        self.dedupe_ttl = dedupe_ttl
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._recent = OrderedDict()
+        self._resolved_at = 0.0
+        self._resolved_track = None
+        self._dropped = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-actions", daemon=True)
+            self._thread.start()
+
+    # === PRODUCERS ===
+    def press(self):
+        """Queue a 'like whatever is playing' event. Safe to call from the keyboard hook."""
+        return self._put((LIKE_CURRENT, None, time.perf_counter()))
+
+    def like(self, tracks):
+        """Queue explicit tracks, given as dicts with at least an "id"."""
+        return self._put((LIKE_IDS, list(tracks), time.perf_counter()))
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self._dropped += 1
+            METRICS.incr("actions.dropped")
+            return False
+
+    # === WORKER ===
+    def _run(self):
+        while True:
+            events = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    events.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                while True:
+                    events.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            dropped, self._dropped = self._dropped, 0
+            if dropped and self.on_overflow:
+                self.on_overflow(dropped)
+            self._process(events)
+
+    def _process(self, events):
+        received_at = events[0][2]
+        METRICS.observe("press.queue_wait", time.perf_counter() - received_at)
+        METRICS.incr("actions.events", len(events))
+        pending = OrderedDict()
+        pressed = None
+        presses = [at for kind, _, at in events if kind == LIKE_CURRENT]
+        if presses and max(presses) <= self._resolved_at and self._resolved_track is not None:
+            # Every press landed while the previous lookup was in flight: same track, no second lookup.
+            METRICS.incr("actions.coalesced", len(presses))
+            pressed = self._resolved_track
+        elif presses:
+            self._resolved_track = None
+            try:
+                pressed = self.resolve_current()
+            except Exception as e:
+                self.on_error([], e)
+            self._resolved_at = time.perf_counter()
+            self._resolved_track = pressed or None
+        if pressed:
+            pressed = dict(pressed, pressed_at=min(presses))
+            pending[pressed["id"]] = pressed
+        for kind, tracks, at in events:
+            if kind == LIKE_IDS:
+                for track in tracks:
+                    pending.setdefault(track["id"], dict(track, pressed_at=at))
+
+        library = self.library
+        if (pressed and library is not None and pressed["id"] in library
+                and self.remove_tracks and self.toggle and self.toggle()):
+            del pending[pressed["id"]]
+            self._recent.pop(pressed["id"], None)
+            self._send(self.remove_tracks, [pressed], self.on_removed)
+
+        now = time.monotonic()
+        for track_id, liked_at in list(self._recent.items()):
+            if now - liked_at > self.dedupe_ttl:
+                del self._recent[track_id]
+        tracks = [t for track_id, t in pending.items() if track_id not in self._recent]
+        recent = [t for track_id, t in pending.items() if track_id in self._recent]
+        if recent and self.on_skipped:
+            self.on_skipped(recent)
+
+        for start in range(0, len(tracks), MAX_IDS_PER_REQUEST):
+            batch = tracks[start:start + MAX_IDS_PER_REQUEST]
+            if self._send(self.save_tracks, batch, self.on_saved):
+                liked_at = time.monotonic()
+                for t in batch:
+                    self._recent[t["id"]] = liked_at
+        METRICS.observe("press.total", time.perf_counter() - received_at)
+
+    def _send(self, request, batch, on_done):
+        try:
+            request([t["id"] for t in batch])
+        except Exception as e:
+            METRICS.incr("actions.errors")
+            self.on_error(batch, e)
+            return False
+        if on_done:
+            on_done(batch)
+        return True
@@ -0,0 +1,301 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from spotikey_core.metrics import METRICS
+
+API_BASE_URL = "https://api.spotify.com/v1"
+ACCOUNTS_BASE_URL = "https://accounts.spotify.com"
+
+
+class SpotifyError(Exception):
+    """A Spotify Web API or accounts request came back with an error status."""
+
+    def __init__(self, status, message="", retry_after=None):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def is_transient(error):
+    """True for failures worth retrying later: network errors, 429 and 5xx."""
+    if isinstance(error, SpotifyError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, requests.RequestException)
+
+
+class RateLimiter:
+    """Token bucket shared by every Spotify call, with a global pause for Retry-After."""
+
+    def __init__(self, rate=5.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (e.g. a 429's Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class SpotifyClient:
+    """Spotify Web API client that keeps persistent connections to each host.
+
+    One requests.Session holds a keep-alive pool per host, so only the first
+    call (or prewarm()) pays for DNS, TCP and TLS. Base URLs can be pointed at
+    a local mock server. Every call passes through one shared RateLimiter.
+    """
+
+    def __init__(self, api_base=API_BASE_URL, accounts_base=ACCOUNTS_BASE_URL, timeout=10, pool_size=4,
+                 limiter=None):
+        self.api_base = api_base.rstrip("/")
+        self.accounts_base = accounts_base.rstrip("/")
+        self.timeout = timeout
+        self.limiter = limiter or RateLimiter()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def prewarm(self):
+        """Open a pooled connection to both hosts ahead of the first hotkey press."""
+        for url in (self.api_base, self.accounts_base):
+            try:
+                self.session.head(url, timeout=self.timeout).close()
+            except requests.RequestException as e:
+                print(f"[WARN] Could not pre-warm connection to {url}: {e}")
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, url, **kwargs):
+        self.limiter.acquire()
+        METRICS.incr("http.requests")
+        try:
+            with METRICS.span("http." + method.lower()):
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            METRICS.incr("http.network_errors")
+            raise
+        if response.status_code == 429:
+            METRICS.incr("http.429")
+            self.limiter.pause(_retry_after(response) or 1.0)
+        elif response.status_code >= 400:
+            METRICS.incr("http.errors")
+        return response
+
+    # === ACCOUNTS ===
+    def request_token(self, form):
+        """POST to the token endpoint and return the decoded body."""
+        response = self._request("POST", self.accounts_base + "/api/token", data=form)
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    # === WEB API ===
+    def currently_playing(self, headers):
+        """Return {"id", "name", ...} for the playing track, or None if nothing is playing."""
+        response = self._request(
+            "GET",
+            self.api_base + "/me/player/currently-playing",
+            headers=headers,
+            params={"additional_types": "track"},
+        )
+        if response.status_code == 204:
+            return None
+        return parse_now_playing(self._decode(response))
+
+    def save_tracks(self, headers, ids):
+        """Add up to 50 track ids to the user's library in one request."""
+        response = self._request(
+            "PUT",
+            self.api_base + "/me/tracks",
+            headers=headers,
+            json={"ids": list(ids)},
+        )
+        self._check(response)
+
+    def remove_tracks(self, headers, ids):
+        """Remove up to 50 track ids from the user's library in one request."""
+        response = self._request(
+            "DELETE",
+            self.api_base + "/me/tracks",
+            headers=headers,
+            json={"ids": list(ids)},
+        )
+        self._check(response)
+
+    def saved_tracks(self, headers, offset=0, limit=50):
+        """Return ([(track_id, added_at), ...], total) for one page of the user's library."""
+        response = self._request(
+            "GET",
+            self.api_base + "/me/tracks",
+            headers=headers,
+            params={"offset": offset, "limit": limit},
+        )
+        body = self._decode(response) or {}
+        items = []
+        for item in body.get("items", []):
+            track = item.get("track") or {}
+            if track.get("id"):
+                items.append((track["id"], item.get("added_at", "")))
+        return items, body.get("total", 0)
+
+    def tracks_contain(self, headers, ids):
+        """Return [bool, ...] saying which of up to 50 track ids are in the user's library."""
+        response = self._request(
+            "GET",
+            self.api_base + "/me/tracks/contains",
+            headers=headers,
+            params={"ids": ",".join(ids)},
+        )
+        return self._decode(response) or []
+
+    def album_tracks(self, headers, album_id, offset=0, limit=50):
+        """Return ([track_id, ...], total) for one page of an album's tracks."""
+        response = self._request(
+            "GET",
+            f"{self.api_base}/albums/{album_id}/tracks",
+            headers=headers,
+            params={"offset": offset, "limit": limit},
+        )
+        body = self._decode(response) or {}
+        return track_ids(body.get("items", [])), body.get("total", 0)
+
+    def player_queue(self, headers):
+        """Return the track ids of the playing track followed by the user's queue."""
+        response = self._request("GET", self.api_base + "/me/player/queue", headers=headers)
+        body = self._decode(response) or {}
+        return track_ids([body.get("currently_playing")] + body.get("queue", []))
+
+    def recently_played(self, headers, limit=50):
+        """Return the track ids of the last `limit` (at most 50) plays, newest first."""
+        response = self._request(
+            "GET",
+            self.api_base + "/me/player/recently-played",
+            headers=headers,
+            params={"limit": limit},
+        )
+        body = self._decode(response) or {}
+        return track_ids(item.get("track") for item in body.get("items", []))
+
+    def playlists(self, headers, offset=0, limit=50):
+        """Return ([{"id", "name", "snapshot_id"}, ...], total) for one page of the user's playlists."""
+        response = self._request(
+            "GET",
+            self.api_base + "/me/playlists",
+            headers=headers,
+            params={"offset": offset, "limit": limit},
+        )
+        body = self._decode(response) or {}
+        items = [{"id": item["id"], "name": item.get("name", ""), "snapshot_id": item.get("snapshot_id", "")}
+                 for item in body.get("items", []) if item and item.get("id")]
+        return items, body.get("total", 0)
+
+    def playlist_track_ids(self, headers, playlist_id, offset=0, limit=100):
+        """Return ([track_id, ...], total) for one page of a playlist, asking only for the ids."""
+        response = self._request(
+            "GET",
+            f"{self.api_base}/playlists/{playlist_id}/tracks",
+            headers=headers,
+            params={"offset": offset, "limit": limit, "fields": "total,items(track(id,type))"},
+        )
+        body = self._decode(response) or {}
+        return track_ids(item.get("track") for item in body.get("items", [])), body.get("total", 0)
+
+    def add_to_playlist(self, headers, playlist_id, ids):
+        """Append up to 100 tracks to a playlist; returns the new snapshot_id."""
+        response = self._request(
+            "POST",
+            f"{self.api_base}/playlists/{playlist_id}/tracks",
+            headers=headers,
+            json={"uris": ["spotify:track:" + track_id for track_id in ids]},
+        )
+        return (self._decode(response) or {}).get("snapshot_id")
+
+    def remove_from_playlist(self, headers, playlist_id, ids, snapshot_id=None):
+        """Remove every occurrence of up to 100 tracks from a playlist; returns the new snapshot_id."""
+        body = {"tracks": [{"uri": "spotify:track:" + track_id} for track_id in ids]}
+        if snapshot_id:
+            body["snapshot_id"] = snapshot_id
+        response = self._request(
+            "DELETE",
+            f"{self.api_base}/playlists/{playlist_id}/tracks",
+            headers=headers,
+            json=body,
+        )
+        return (self._decode(response) or {}).get("snapshot_id")
+
+    def _decode(self, response):
+        self._check(response)
+        if not response.content:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def _check(self, response):
+        if response.status_code < 400:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        raise SpotifyError(response.status_code, error_message(body), _retry_after(response))
+
+
+def parse_now_playing(body):
+    """Slim {"id", "name", ...} dict from a currently-playing body, or None if no track is playing."""
+    item = body.get("item") if body else None
+    if not item or not item.get("id"):
+        return None
+    return {
+        "id": item["id"],
+        "name": item.get("name", ""),
+        "is_playing": body.get("is_playing", False),
+        "progress_ms": body.get("progress_ms"),
+        "duration_ms": item.get("duration_ms"),
+        "artist": ", ".join(artist.get("name", "") for artist in item.get("artists") or []),
+        "album": (item.get("album") or {}).get("name", ""),
+        "album_id": (item.get("album") or {}).get("id"),
+    }
+
+
+def track_ids(items):
+    """Ids of the tracks among `items`, skipping episodes and local files."""
+    return [item["id"] for item in items if item and item.get("id") and item.get("type", "track") == "track"]
+
+
+def error_message(body):
+    try:
+        return body.get("error", {}).get("message", "")
+    except AttributeError:
+        return ""
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError, TypeError):
+        return None
@@ -0,0 +1,164 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from spotikey_core.metrics import METRICS
+
+MAX_IDS_PER_REQUEST = 50
+PAGE_SIZE = 50
+
+# Source name -> how it reads in log lines.
+SOURCES = {
+    "album": "current album",
+    "queue": "playback queue",
+    "recent": "recently played tracks",
+}
+
+
+class BulkCancelled(Exception):
+    """cancel() was called; the job stopped at the next batch boundary."""
+
+
+def batches(ids, size=MAX_IDS_PER_REQUEST):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+class BulkLike:
+    """Likes every track from one source (an album, the queue, recently played) in a few requests.
+
+    collect(job) returns the source's track ids, using job.fetch_pages() for
+    paged endpoints so the pages after the first are fetched concurrently.
+    Duplicate ids are dropped, ids the library index already holds are
+    skipped without a request, and the rest are checked with
+    GET /me/tracks/contains in concurrent batches of 50. Only unsaved tracks
+    are written, 50 per request. cancel() stops the job at the next batch;
+    batches already written stay saved.
+
+    save(ids) returns False when the batch was parked for a later retry
+    rather than written now. on_progress(job) is called on every state
+    change and after every written batch, on_done(job) once at the end.
+    """
+
+    def __init__(self, source, collect, contains, save, library=None, on_progress=None, on_done=None, workers=4):
+        self.source = source
+        self.collect = collect
+        self.contains = contains
+        self.save = save
+        self.library = library
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.workers = workers
+        self.state = "pending"
+        self.found = 0
+        self.already_saved = 0
+        self.to_save = 0
+        self.saved = 0
+        self.queued = 0
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def label(self):
+        return SOURCES.get(self.source, self.source)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-bulk", daemon=True)
+            self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def running(self):
+        return self.state not in ("done", "cancelled", "failed")
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def progress(self):
+        return {
+            "source": self.source,
+            "state": self.state,
+            "found": self.found,
+            "already_saved": self.already_saved,
+            "to_save": self.to_save,
+            "saved": self.saved,
+            "queued": self.queued,
+            "error": str(self.error) if self.error else None,
+        }
+
+    def fetch_pages(self, fetch_page, page_size=PAGE_SIZE):
+        """Every item of a paged endpoint. fetch_page(offset, limit) -> (items, total)."""
+        items, total = fetch_page(0, page_size)
+        for page, _ in self._map(lambda offset: fetch_page(offset, page_size), range(page_size, total, page_size)):
+            items.extend(page)
+        return items
+
+    # === WORKER ===
+    def _run(self):
+        try:
+            with METRICS.span("stage.bulk"):
+                self._set_state("collecting")
+                ids = list(dict.fromkeys(track_id for track_id in self.collect(self) if track_id))
+                self.found = len(ids)
+                self._set_state("checking")
+                unsaved = self._unsaved(ids)
+                self.already_saved = self.found - len(unsaved)
+                self.to_save = len(unsaved)
+                self._set_state("saving")
+                for batch in batches(unsaved):
+                    self._check_cancelled()
+                    if self.save(batch):
+                        self.saved += len(batch)
+                    else:
+                        self.queued += len(batch)
+                    METRICS.incr("bulk.saved", len(batch))
+                    self._report()
+            self._set_state("done")
+        except BulkCancelled:
+            METRICS.incr("bulk.cancelled")
+            self._set_state("cancelled")
+        except Exception as e:
+            self.error = e
+            self._set_state("failed")
+        if self.on_done:
+            self.on_done(self)
+
+    def _unsaved(self, ids):
+        library = self.library
+        unknown = [track_id for track_id in ids if library is None or track_id not in library]
+        METRICS.incr("bulk.index_skips", len(ids) - len(unknown))
+        flags = []
+        for batch_flags in self._map(self.contains, batches(unknown)):
+            flags.extend(batch_flags)
+        return [track_id for track_id, saved in zip(unknown, flags) if not saved]
+
+    def _map(self, func, items):
+        """func over items on a small pool, results in order; queued calls are dropped on cancel()."""
+        items = list(items)
+        if not items:
+            return []
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(func, item) for item in items]
+            try:
+                for future in futures:
+                    self._check_cancelled()
+                    results.append(future.result())
+            finally:
+                for future in futures:
+                    future.cancel()
+        return results
+
+    def _check_cancelled(self):
+        if self._cancel.is_set():
+            raise BulkCancelled()
+
+    def _set_state(self, state):
+        self.state = state
+        self._report()
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(self)
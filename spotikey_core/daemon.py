@@ -0,0 +1,246 @@
+"""Headless Spotikey: the engine plus the IPC command socket, no window or tray.
+
+    python -m spotikey_core.daemon run [--appdata DIR] [--hotkey] [--toasts] [--profile] [--trace-malloc]
+    python -m spotikey_core.daemon send like
+    python -m spotikey_core.daemon send status
+    python -m spotikey_core.daemon send like_ids 'ids=["4uLU6hMCjMI75M1A2tKUQC"]'
+    python -m spotikey_core.daemon send like_bulk source=album
+    python -m spotikey_core.daemon send search_history text=radiohead
+    python -m spotikey_core.daemon send playlist_add playlist="Road trip"
+    python -m spotikey_core.daemon send profile_start seconds=60
+    python -m spotikey_core.daemon send heap_snapshot
+    python -m spotikey_core.daemon multi --accounts accounts.json
+    python -m spotikey_core.daemon send --multi like account=alice
+
+`send` talks to whichever Spotikey is running, the tray app or this daemon,
+so scripts and other input devices reuse its warm connection and token.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+
+from spotikey_core.api import API_BASE_URL, ACCOUNTS_BASE_URL
+from spotikey_core.engine import Engine, default_appdata_dir
+from spotikey_core.ipc import CommandError, CommandServer, ipc_endpoint, send_command, start_command_server
+from spotikey_core.prefetch import hotkey_prefix
+
+MULTI_SOCKET_NAME = "spotikey-multi"
+MULTI_DEFAULTS = {
+    "api_base_url": API_BASE_URL,
+    "accounts_base_url": ACCOUNTS_BASE_URL,
+    "pool_size": 64,
+    "accounts": {},
+}
+
+
+# === ADAPTERS ===
+def attach_hotkey(engine):
+    """Bind the configured hotkeys with the optional `keyboard` package."""
+    try:
+        import keyboard
+    except ImportError:
+        print("[WARN] The keyboard package is not installed; running without a hotkey.")
+        return
+    bound = []
+
+    def bind():
+        for handle in bound:
+            keyboard.remove_hotkey(handle)
+        bound.clear()
+        hotkey = engine.store.get("hotkey", "ctrl+alt+l")
+        for combo, callback in engine.hotkey_actions().items():
+            bound.append(keyboard.add_hotkey(combo, callback))
+        prefix = hotkey_prefix(hotkey)
+        if prefix and engine.store.get("speculative_prefetch", False):
+            bound.append(keyboard.add_hotkey(prefix, engine.speculate))
+        engine.log(f"Hotkey set to {hotkey}")
+
+    bind()
+    engine.store.subscribe(lambda changed: bind(), keys=("hotkey", "hotkeys", "speculative_prefetch"))
+
+
+def toast_backend():
+    try:
+        import win10toast  # noqa: F401
+    except ImportError:
+        print("[WARN] win10toast is not installed; notifications are disabled.")
+        return None
+    from spotikey_core.notifications import ToastBackend
+    return ToastBackend()
+
+
+# === COMMANDS ===
+def run(args):
+    engine = Engine(args.appdata, notifier_backend=toast_backend() if args.toasts else None)
+    engine.start_logging()
+    if args.profile:
+        engine.start_profile()
+    if args.trace_malloc:
+        engine.heap_snapshot()
+    engine.load_token()
+    if not engine.store.get("token_info", {}).get("refresh_token"):
+        engine.log("⚙ Not authorised yet. Run Spotikey once to sign in to Spotify.")
+    engine.start()
+    stop = threading.Event()
+    engine.commands["shutdown"] = lambda: stop.set() or {"stopping": True}
+    try:
+        server = start_command_server(engine)
+    except OSError as e:
+        engine.log(f"❌ Could not open the command socket: {e}")
+        engine.flush()
+        return 1
+    if args.hotkey:
+        attach_hotkey(engine)
+    signal.signal(signal.SIGINT, lambda sig, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda sig, frame: stop.set())
+    engine.log(f"🎵 Spotikey engine listening on {server.address}")
+    while not stop.wait(1):
+        pass
+    server.stop()
+    if args.trace_malloc:
+        engine.heap_snapshot()
+    engine.flush()
+    return 0
+
+
+def run_multi(args):
+    """Serve every account in the accounts file from one event loop.
+
+    The file holds {"accounts": {"<id>": {"client_id", "client_secret", "token_info"}}}
+    plus optional api/accounts base URLs and pool_size; refreshed tokens are written back.
+    """
+    from spotikey_core.logbook import LogBook
+    from spotikey_core.metrics import METRICS
+    from spotikey_core.multi import MultiAccountEngine
+    from spotikey_core.store import ConfigStore
+
+    os.makedirs(args.appdata, exist_ok=True)
+    store = ConfigStore(args.accounts, MULTI_DEFAULTS)
+    logbook = LogBook(os.path.join(args.appdata, "spotikey_multi.log"))
+    logbook.start()
+
+    def log(msg):
+        print(msg)
+        logbook.write(msg)
+
+    def on_result(account_id, outcome, detail):
+        if outcome == "liked":
+            log(f"💚 [{account_id}] Liked: {detail.get('name') or detail['id']}")
+        elif outcome == "already_liked":
+            log(f"💚 [{account_id}] Already liked: {detail.get('name') or detail['id']}")
+        elif outcome == "nothing_playing":
+            log(f"⚠ [{account_id}] No track is currently playing.")
+        else:
+            log(f"❌ [{account_id}] Error: {detail}")
+
+    def on_token(account_id, token_info):
+        accounts = store.get("accounts", {})
+        if account_id in accounts:
+            accounts[account_id]["token_info"] = token_info
+            store.set("accounts", accounts)
+
+    engine = MultiAccountEngine(store.get("api_base_url"), store.get("accounts_base_url"),
+                                pool_size=store.get("pool_size", 64), on_result=on_result, on_token=on_token)
+    for account_id, account in store.get("accounts", {}).items():
+        engine.add_account(account_id, account.get("client_id", ""), account.get("client_secret", ""),
+                           account.get("token_info"), rate=account.get("api_rate_limit", 5),
+                           burst=account.get("api_rate_burst", 10))
+
+    async def serve():
+        await engine.start()
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+
+        def on_loop(func, *func_args):
+            async def call():
+                return func(*func_args)
+            return asyncio.run_coroutine_threadsafe(call(), loop).result(timeout=5)
+
+        def like(account):
+            engine.press_threadsafe(account)
+            return {"queued": True}
+
+        def shutdown():
+            loop.call_soon_threadsafe(stop.set)
+            return {"stopping": True}
+
+        commands = {
+            "ping": lambda: {"app": "Spotikey", "accounts": len(engine.accounts)},
+            "like": like,
+            "accounts": lambda: sorted(engine.accounts),
+            "status": lambda account=None: on_loop(engine.status, account),
+            "metrics": METRICS.snapshot,
+            "shutdown": shutdown,
+        }
+        address, authkey = ipc_endpoint(args.appdata, MULTI_SOCKET_NAME)
+        server = CommandServer(address, authkey, commands)
+        signal.signal(signal.SIGINT, lambda sig, frame: loop.call_soon_threadsafe(stop.set))
+        signal.signal(signal.SIGTERM, lambda sig, frame: loop.call_soon_threadsafe(stop.set))
+        try:
+            server.start()
+            log(f"🎵 Serving {len(engine.accounts)} account(s) on {address}")
+            await stop.wait()
+        finally:
+            server.stop()
+            await engine.close()
+
+    try:
+        asyncio.run(serve())
+    except OSError as e:
+        log(f"❌ Could not open the command socket: {e}")
+        return 1
+    finally:
+        store.flush()
+        logbook.flush()
+    return 0
+
+
+def parse_arg(item):
+    key, _, value = item.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def send(args):
+    address, authkey = ipc_endpoint(args.appdata, MULTI_SOCKET_NAME if args.multi else "spotikey")
+    try:
+        result = send_command(address, authkey, args.cmd, timeout=args.timeout, **dict(map(parse_arg, args.args)))
+    except (OSError, CommandError, TimeoutError) as e:
+        print(f"Spotikey: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m spotikey_core.daemon", description="Headless Spotikey engine.")
+    parser.add_argument("--appdata", default=default_appdata_dir(), help="Spotikey data folder")
+    sub = parser.add_subparsers(dest="action", required=True)
+    run_parser = sub.add_parser("run", help="run the engine and serve IPC commands")
+    run_parser.add_argument("--hotkey", action="store_true", help="also bind the configured global hotkey")
+    run_parser.add_argument("--toasts", action="store_true", help="show Windows toast notifications")
+    run_parser.add_argument("--profile", action="store_true",
+                            help="sample every thread from startup; the profile is saved on shutdown")
+    run_parser.add_argument("--trace-malloc", action="store_true",
+                            help="trace allocations from startup and write heap snapshots at startup and shutdown")
+    multi_parser = sub.add_parser("multi", help="serve many accounts from one process")
+    multi_parser.add_argument("--accounts", required=True, help="JSON file with the accounts to serve")
+    send_parser = sub.add_parser("send", help="send a command to a running Spotikey")
+    send_parser.add_argument("cmd", help="like, like_ids, like_bulk, cancel_bulk, bulk_status, history, "
+                             "search_history, history_stats, export_history, playlist_add, playlist_remove, playlists, "
+                             "profile_start, profile_stop, heap_snapshot, heap_stop, diagnostics, status, metrics, ping, shutdown (multi: like, accounts, status)")
+    send_parser.add_argument("args", nargs="*", help="key=value arguments; values are parsed as JSON when possible")
+    send_parser.add_argument("--timeout", type=float, default=5.0)
+    send_parser.add_argument("--multi", action="store_true", help="talk to the multi-account daemon")
+    args = parser.parse_args(argv)
+    return {"run": run, "multi": run_multi, "send": send}[args.action](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
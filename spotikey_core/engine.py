@@ -0,0 +1,729 @@
+import os
+import sys
+import threading
+import time
+
+from spotikey_core.actions import ActionQueue
+from spotikey_core.api import SpotifyClient, SpotifyError, RateLimiter, is_transient, API_BASE_URL, ACCOUNTS_BASE_URL
+from spotikey_core.bulk import BulkLike, SOURCES as BULK_SOURCES
+from spotikey_core.history import LikeHistory
+from spotikey_core.library import LibraryIndex
+from spotikey_core.logbook import LogBook
+from spotikey_core.metrics import METRICS
+from spotikey_core.notifications import NotificationDispatcher, NullBackend
+from spotikey_core.nowplaying import NowPlayingTracker
+from spotikey_core.outbox import MutationOutbox, QueuedForRetry
+from spotikey_core.playlists import PlaylistDirectory
+from spotikey_core.prefetch import MISS, Prefetcher
+from spotikey_core.profiling import Diagnostics
+from spotikey_core.scheduler import Scheduler
+from spotikey_core.store import ConfigStore
+from spotikey_core.tokens import TokenManager, TokenUnavailable
+
+# Worker threads in each paged-fetch pool (library sync, playlist sync, bulk likes).
+FETCH_WORKERS = 4
+# The action worker, the outbox and the now-playing tracker.
+PRESS_PATH_THREADS = 3
+
+DEFAULT_DATA = {
+    "hotkey": "ctrl+alt+l",
+    "notifications": True,
+    "client_id": "",
+    "client_secret": "",
+    "token_info": {},
+    "run_on_startup": False,
+    "api_base_url": API_BASE_URL,
+    "accounts_base_url": ACCOUNTS_BASE_URL,
+    "now_playing_tracker": False,
+    "now_playing_polls_per_minute": 12,
+    "library_index": True,
+    "library_sync_interval": 1800,
+    "like_mode": "like",
+    "api_rate_limit": 5,
+    "api_rate_burst": 10,
+    "lookup_retries": 3,
+    "lookup_retry_budget": 10,
+    "log_max_bytes": 1000000,
+    "log_backups": 3,
+    "log_max_age_days": 0,
+    "log_format": "text",
+    "metrics_enabled": False,
+    "update_check_ttl_hours": 6,
+    "login_timeout": 300,
+    "like_history": True,
+    "speculative_prefetch": False,
+    "prefetch_per_minute": 6,
+    "prefetch_ttl": 2.0,
+    "release_window_when_hidden": True,
+    "hotkeys": {},
+    "playlist_sync_interval": 1800
+}
+
+
+def default_appdata_dir():
+    """%APPDATA%\\Spotikey on Windows, ~/.config/Spotikey elsewhere."""
+    base = os.getenv("APPDATA") or os.getenv("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "Spotikey")
+
+
+def track_name(track):
+    return track.get("name") or track["id"]
+
+
+class Engine:
+    """Spotikey without any UI, meant to live for the whole session.
+
+    Owns the settings, token manager, Spotify client, action queue, outbox
+    and library index, so every trigger (hotkey, tray, IPC command) reuses
+    the same warm connections and token. Front ends attach through
+    add_log_listener(), the notifier backend and `commands`, the table of
+    IPC handlers they may extend.
+    """
+
+    def __init__(self, appdata_dir, app_name="Spotikey", app_version="", notifier_backend=None):
+        os.makedirs(appdata_dir, exist_ok=True)
+        self.appdata_dir = appdata_dir
+        self.app_name = app_name
+        self.app_version = app_version
+        self.data_file = os.path.join(appdata_dir, "spotikey_data.json")
+        self.log_file = os.path.join(appdata_dir, "spotikey.log")
+        self.library_file = os.path.join(appdata_dir, "spotikey_library.db")
+        self.outbox_file = os.path.join(appdata_dir, "spotikey_outbox.jsonl")
+        self.metrics_file = os.path.join(appdata_dir, "spotikey_metrics.json")
+        self.history_file = os.path.join(appdata_dir, "spotikey_history.db")
+        self.playlists_file = os.path.join(appdata_dir, "spotikey_playlists.json")
+        self.profiles_dir = os.path.join(appdata_dir, "profiles")
+
+        self.scheduler = Scheduler()
+        self.scheduler.start()
+        store = self.store = ConfigStore(self.data_file, DEFAULT_DATA, scheduler=self.scheduler)
+        # One pooled connection per thread that can be talking to Spotify at once, so
+        # overlapping background fetches never push a press's warm connection out of the pool.
+        self.spotify = SpotifyClient(store.get("api_base_url", API_BASE_URL),
+                                     store.get("accounts_base_url", ACCOUNTS_BASE_URL),
+                                     pool_size=PRESS_PATH_THREADS + self.scheduler.workers + 3 * FETCH_WORKERS,
+                                     limiter=RateLimiter(store.get("api_rate_limit", 5), store.get("api_rate_burst", 10)))
+        self.logbook = LogBook(self.log_file, max_bytes=store.get("log_max_bytes", 1000000),
+                               backups=store.get("log_backups", 3), max_age=store.get("log_max_age_days", 0) * 86400,
+                               structured=store.get("log_format") == "jsonl")
+        self.notifier = NotificationDispatcher(
+            notifier_backend or NullBackend(),
+            enabled=lambda: store.get("notifications", True),
+            summaries={"liked": "💚 Liked {count} tracks", "unliked": "💔 Unliked {count} tracks"},
+        )
+        self.tokens = TokenManager(self.refresh_token,
+                                   on_refreshed=lambda info: self.log("🔄 Token refreshed successfully."),
+                                   on_failed=self._on_refresh_failed, scheduler=self.scheduler)
+        self.outbox = MutationOutbox(self.outbox_file, self.send_library_mutation, self.is_retryable,
+                                     on_sent=self._on_outbox_sent, on_dropped=self._on_outbox_dropped)
+        self.actions = ActionQueue(self.resolve_current_track, self.save_tracks, self._on_saved, self._on_action_error,
+                                   self._on_overflow, remove_tracks=self.remove_tracks, on_removed=self._on_removed,
+                                   on_skipped=self._on_skipped,
+                                   toggle=lambda: store.get("like_mode", "like") == "toggle")
+        self.prefetch = Prefetcher(self.fetch_current_track,
+                                   ttl=store.get("prefetch_ttl", 2.0), per_minute=store.get("prefetch_per_minute", 6))
+        self.playlists = PlaylistDirectory(
+            self.playlists_file,
+            lambda offset, limit: self.spotify.playlists(self.require_headers(), offset, limit),
+            lambda playlist_id, offset, limit: self.spotify.playlist_track_ids(self.require_headers(), playlist_id,
+                                                                                offset, limit),
+            workers=FETCH_WORKERS, scheduler=self.scheduler)
+        self._playlist_lock = threading.Lock()
+        self._playlist_job = None
+        self.diagnostics = Diagnostics(self.profiles_dir, scheduler=self.scheduler, on_saved=self._on_profile_saved)
+        self.now_playing = None
+        self.library = None
+        self.history = None
+        self._library_job = None
+        self.bulk = None
+        self.started = False
+        self._log_listeners = []
+        self.commands = {
+            "ping": lambda: {"app": app_name, "version": app_version},
+            "like": self.press,
+            "like_ids": self.like_ids,
+            "like_bulk": self.like_bulk,
+            "cancel_bulk": self.cancel_bulk,
+            "bulk_status": self.bulk_status,
+            "history": self.recent_history,
+            "search_history": self.search_history,
+            "history_stats": self.history_stats,
+            "export_history": self.export_history,
+            "playlist_add": lambda playlist: self.playlist_action("add", playlist),
+            "playlist_remove": lambda playlist: self.playlist_action("remove", playlist),
+            "playlists": self.playlists.list,
+            "status": self.status,
+            "metrics": METRICS.snapshot,
+            "profile_start": self.start_profile,
+            "profile_stop": self.stop_profile,
+            "heap_snapshot": self.heap_snapshot,
+            "heap_stop": self.stop_heap,
+            "diagnostics": self.diagnostics.status,
+        }
+
+        METRICS.gauge("token.remaining_s", self.tokens.remaining)
+        METRICS.gauge("actions.queue_depth", self.actions.depth)
+        METRICS.gauge("outbox.pending", self.outbox.pending)
+        METRICS.gauge("log.dropped", lambda: self.logbook.dropped)
+        METRICS.gauge("notify.pending", self.notifier.pending)
+
+    # === LIFECYCLE ===
+    def start_logging(self):
+        self.logbook.start()
+        self.notifier.start()
+
+    def load_token(self):
+        """Hand the saved token to the token manager; an expired one refreshes in the background."""
+        self.tokens.set_token(self.store.get("token_info") or {})
+
+    def start(self):
+        """Start the action worker, outbox, like history, library index and now-playing tracker."""
+        if self.started:
+            return
+        self.started = True
+        self.start_logging()
+        self.start_history()
+        self.actions.start()
+        self.scheduler.submit(self.spotify.prewarm)
+        self.start_library_index()
+        self._playlist_job = self.scheduler.every(lambda: self.store.get("playlist_sync_interval", 1800),
+                                                  self._sync_playlists, background=True, first_delay=0)
+        self.outbox.start()
+        self.set_now_playing_tracker(self.store.get("now_playing_tracker", False))
+        self.store.subscribe(lambda changed: self.set_now_playing_tracker(changed["now_playing_tracker"]),
+                             keys=("now_playing_tracker",))
+
+    def flush(self):
+        if self.store.get("metrics_enabled", False):
+            self.dump_metrics()
+        if self.diagnostics.profiler is not None:
+            self.stop_profile()  # a profile left running is saved at shutdown
+        self.store.flush()
+        self.playlists.flush()
+        self.notifier.flush(timeout=0.5)
+        if self.history is not None:
+            self.history.flush()
+        self.logbook.flush()
+
+    # === LOGGING ===
+    def add_log_listener(self, listener):
+        self._log_listeners.append(listener)
+
+    def log(self, msg):
+        stdout = sys.stdout
+        if stdout is not None and stdout.isatty():
+            # Echo to a console only; under pythonw or a redirect the log file already has every line.
+            print(msg)
+        self.logbook.write(msg)
+        for listener in self._log_listeners:
+            listener(msg)
+
+    def notify(self, message, group=None, count=1):
+        self.notifier.notify(self.app_name, message, group=group, count=count)
+
+    # === COMMANDS ===
+    def press(self):
+        """Like (or toggle) whatever is playing; returns once the press is queued."""
+        return {"queued": self.actions.press()}
+
+    def like_ids(self, ids):
+        return {"queued": self.actions.like([{"id": track_id, "source": "ids"} for track_id in ids])}
+
+    def like_bulk(self, source):
+        """Like every track of `source` ("album", "queue" or "recent") in the background.
+
+        Returns the job's progress; only one bulk job runs at a time.
+        """
+        collect = {"album": self.collect_album, "queue": self.collect_queue, "recent": self.collect_recent}.get(source)
+        if collect is None:
+            raise ValueError(f"unknown source {source!r}, expected one of {', '.join(BULK_SOURCES)}")
+        job = self.bulk
+        if job is not None and job.running():
+            self.log(f"⏳ Still liking the {job.label}; cancel that first.")
+            return job.progress()
+        job = self.bulk = BulkLike(source, collect, self._bulk_contains, self._bulk_save, library=self.actions.library,
+                                   on_progress=self._on_bulk_progress, on_done=self._on_bulk_done,
+                                   workers=FETCH_WORKERS)
+        self.log(f"📦 Liking the {job.label}...")
+        job.start()
+        return job.progress()
+
+    def cancel_bulk(self):
+        job = self.bulk
+        if job is None or not job.running():
+            return {"cancelled": False}
+        job.cancel()
+        return {"cancelled": True}
+
+    def bulk_status(self):
+        return self.bulk.progress() if self.bulk else None
+
+    def status(self):
+        track = self.now_playing.current() if self.now_playing else None
+        return {
+            "version": self.app_version,
+            "token_valid": self.tokens.is_valid(),
+            "token_remaining_s": self.tokens.remaining(),
+            "queue_depth": self.actions.depth(),
+            "outbox_pending": self.outbox.pending(),
+            "library_size": len(self.library) if self.library is not None else None,
+            "now_playing": track,
+            "bulk": self.bulk_status(),
+            "prefetch": self.prefetch.stats() if self.store.get("speculative_prefetch", False) else None,
+        }
+
+    def dump_metrics(self):
+        try:
+            METRICS.dump(self.metrics_file)
+            self.log(f"📈 Metrics saved to {self.metrics_file}")
+        except OSError as e:
+            self.log(f"❌ Could not save metrics: {e}")
+
+    # === DIAGNOSTICS ===
+    def start_profile(self, interval_ms=5, seconds=None):
+        """Sample every thread's stack until stop_profile() (or for `seconds`); see profiling.Diagnostics."""
+        result = self.diagnostics.start_profile(interval_ms, seconds)
+        until = f" for {seconds} s" if seconds else "; stop it from the tray or with profile_stop"
+        self.log(f"🔬 Profiling every {interval_ms} ms{until}.")
+        return result
+
+    def stop_profile(self):
+        report = self.diagnostics.stop_profile()
+        if report is None:
+            self.log("🔬 No profile is running.")
+        else:
+            self._on_profile_saved(report)
+        return report
+
+    def _on_profile_saved(self, report):
+        self.log(f"🔬 Profile saved ({report['samples']} samples over {report['seconds']} s, one every "
+                 f"{report['interval_ms']} ms): {report['pstats']}")
+
+    def heap_snapshot(self, top=25):
+        """Snapshot traced allocations (tracing starts on the first call) and write a report."""
+        report = self.diagnostics.heap_snapshot(top)
+        growth = f", {report['growth_kb']:+.1f} KiB since the last one" if report["growth_kb"] is not None else \
+            " (tracing started; take another to see growth)"
+        self.log(f"🧮 Heap snapshot: {report['traced_kb']:.0f} KiB traced{growth}. Report: {report['report']}")
+        return report
+
+    def stop_heap(self):
+        stopped = self.diagnostics.stop_heap()
+        if stopped:
+            self.log("🧮 Allocation tracing stopped.")
+        return {"stopped": stopped}
+
+    # === TOKENS ===
+    def refresh_token(self, token_info):
+        form = {
+            "grant_type": "refresh_token",
+            "refresh_token": token_info["refresh_token"],
+            "client_id": self.store.get("client_id"),
+        }
+        if self.store.get("client_secret"):
+            form["client_secret"] = self.store.get("client_secret")
+        data = self.spotify.request_token(form)
+        if 'access_token' in data:
+            if 'refresh_token' not in data:
+                data['refresh_token'] = token_info["refresh_token"]
+            data['expires_at'] = int(time.time()) + data.get('expires_in', 3600)
+            self.save_token_info(data)
+            return data
+        return None
+
+    def save_token_info(self, token_info):
+        self.store.set("token_info", token_info)
+
+    def _on_refresh_failed(self, failures, retry_in):
+        self.log(f"⚠ Token refresh failed ({failures}x), retrying in {int(retry_in)}s.")
+
+    def get_headers(self):
+        with METRICS.span("stage.get_headers"):
+            headers = self.tokens.headers()
+        if not headers:
+            self.log("❌ Token expired and refresh failed. Please re-login.")
+            self.notify("Token expired. Please re-login.")
+        return headers
+
+    def require_headers(self):
+        """get_headers() for background jobs: raises TokenUnavailable instead of returning None."""
+        headers = self.get_headers()
+        if not headers:
+            raise TokenUnavailable()
+        return headers
+
+    # === NOW PLAYING ===
+    def fetch_current_track(self):
+        headers = self.tokens.headers()
+        if not headers:
+            return None
+        return self.spotify.currently_playing(headers)
+
+    def set_now_playing_tracker(self, enabled):
+        if enabled and not self.now_playing:
+            self.now_playing = NowPlayingTracker(self.fetch_current_track,
+                                                 polls_per_minute=self.store.get("now_playing_polls_per_minute", 12))
+            self.now_playing.start()
+            self.log("🎧 Now-playing tracker enabled.")
+        elif not enabled and self.now_playing:
+            self.now_playing.stop()
+            self.now_playing = None
+            self.log("🎧 Now-playing tracker disabled.")
+
+    def speculate(self):
+        """Hotkey modifiers went down: start the currently-playing lookup ahead of the press."""
+        if not self.store.get("speculative_prefetch", False):
+            return
+        if self.now_playing and self.now_playing.current():
+            return
+        self.prefetch.speculate()
+
+    def resolve_current_track(self):
+        tracker = self.now_playing
+        if tracker:
+            track = tracker.current()
+            if track:
+                METRICS.incr("now_playing.cache_hits")
+                return track
+            METRICS.incr("now_playing.cache_misses")
+        track = self.prefetch.take() if self.store.get("speculative_prefetch", False) else MISS
+        if track is MISS:
+            headers = self.get_headers()
+            if not headers:
+                return None
+            with METRICS.span("stage.currently_playing"):
+                track = self.lookup_current_track(headers)
+        if tracker:
+            tracker.update(track)
+        if not track:
+            self.log("⚠ No track is currently playing.")
+        return track
+
+    def lookup_current_track(self, headers):
+        """GET currently-playing for a press, retrying 429s, 5xx and network errors a bounded number of times.
+
+        A 429 has already paused the shared rate limiter for its Retry-After,
+        so the retry just waits its turn there; other failures back off 0.5 s,
+        1 s, 2 s. Gives up, raising the last error, after `lookup_retries`
+        retries or when the next wait would run past `lookup_retry_budget`
+        seconds, since by then the playing track may well have changed.
+        """
+        retries = self.store.get("lookup_retries", 3)
+        deadline = time.monotonic() + self.store.get("lookup_retry_budget", 10)
+        backoff = 0.5
+        for attempt in range(retries + 1):
+            try:
+                return self.spotify.currently_playing(headers)
+            except Exception as e:
+                if not is_transient(e) or attempt == retries:
+                    raise
+                rate_limited = isinstance(e, SpotifyError) and e.status == 429
+                wait = (e.retry_after or 1.0) if rate_limited else backoff
+                if time.monotonic() + wait > deadline:
+                    raise
+                METRICS.incr("lookup.retries")
+                if not rate_limited:
+                    time.sleep(backoff)
+                    backoff *= 2
+
+    # === LIBRARY WRITES ===
+    def send_library_mutation(self, op, ids):
+        headers = self.get_headers()
+        if not headers:
+            raise TokenUnavailable()
+        if op == "remove":
+            with METRICS.span("stage.remove_tracks"):
+                self.spotify.remove_tracks(headers, ids)
+            if self.library is not None:
+                self.library.remove(ids)
+        else:
+            with METRICS.span("stage.save_tracks"):
+                self.spotify.save_tracks(headers, ids)
+            if self.library is not None:
+                self.library.add(ids)
+
+    @staticmethod
+    def is_retryable(error):
+        return is_transient(error) or isinstance(error, TokenUnavailable)
+
+    def write_library(self, op, ids):
+        """Send a library mutation now, or park it in the outbox if Spotify can't take it."""
+        if self.outbox.pending():
+            # Keep mutations in order behind the existing backlog.
+            self.outbox.add(op, ids)
+            raise QueuedForRetry(len(ids))
+        try:
+            self.send_library_mutation(op, ids)
+        except Exception as e:
+            if not self.is_retryable(e):
+                raise
+            self.outbox.add(op, ids)
+            raise QueuedForRetry(len(ids), e)
+
+    def save_tracks(self, ids):
+        self.write_library("save", ids)
+
+    def remove_tracks(self, ids):
+        self.write_library("remove", ids)
+
+    def _on_outbox_sent(self, op, ids):
+        self.record_history("unlike" if op == "remove" else "like", [{"id": track_id} for track_id in ids], "outbox")
+        verb = "Unliked" if op == "remove" else "Liked"
+        self.log(f"✅ {verb} {len(ids)} queued track(s). {self.outbox.pending()} batch(es) still pending.")
+
+    def _on_outbox_dropped(self, op, ids, error):
+        self.log(f"❌ Gave up on {len(ids)} queued track(s): {error}")
+
+    # === ACTION CALLBACKS ===
+    def _on_saved(self, tracks):
+        self.record_history("like", tracks)
+        for track in tracks:
+            self.log(f"💚 Liked: {track_name(track)}")
+        self.notify(f"💚 Liked: {track_name(tracks[0])}", group="liked", count=len(tracks))
+
+    def _on_removed(self, tracks):
+        self.record_history("unlike", tracks)
+        for track in tracks:
+            self.log(f"💔 Unliked: {track_name(track)}")
+        self.notify(f"💔 Unliked: {track_name(tracks[0])}", group="unliked", count=len(tracks))
+
+    def _on_skipped(self, tracks):
+        for track in tracks:
+            self.log(f"💚 Already liked: {track_name(track)}")
+
+    def _on_action_error(self, tracks, error):
+        if isinstance(error, QueuedForRetry):
+            self.log(f"⏳ Spotify unavailable, {error.count} track(s) queued for retry.")
+        elif tracks:
+            self.log(f"❌ Failed to like track: {', '.join(track_name(t) for t in tracks)} ({error})")
+        else:
+            self.log(f"❌ Error: {error}")
+
+    def _on_overflow(self, dropped):
+        self.log(f"⚠ Hotkey queue full, ignored {dropped} press(es).")
+
+    # === BULK ACTIONS ===
+    def collect_album(self, job):
+        track = self.resolve_current_track()
+        if not track or not track.get("album_id"):
+            return []
+        headers = self.require_headers()
+        return job.fetch_pages(lambda offset, limit: self.spotify.album_tracks(headers, track["album_id"], offset, limit))
+
+    def collect_queue(self, job):
+        return self.spotify.player_queue(self.require_headers())
+
+    def collect_recent(self, job):
+        return self.spotify.recently_played(self.require_headers())
+
+    def _bulk_contains(self, ids):
+        with METRICS.span("stage.tracks_contain"):
+            return self.spotify.tracks_contain(self.require_headers(), ids)
+
+    def _bulk_save(self, ids):
+        try:
+            self.save_tracks(ids)
+        except QueuedForRetry:
+            return False
+        self.record_history("like", [{"id": track_id} for track_id in ids], "bulk:" + self.bulk.source)
+        return True
+
+    def _on_bulk_progress(self, job):
+        if job.state != "saving":
+            return
+        if job.saved + job.queued == 0:
+            self.log(f"🔎 {job.found} track(s) in the {job.label}: {job.already_saved} already liked, "
+                     f"{job.to_save} to like.")
+        elif job.saved + job.queued < job.to_save:
+            self.log(f"💚 Liked {job.saved + job.queued}/{job.to_save} from the {job.label}...")
+
+    def _on_bulk_done(self, job):
+        done = job.saved + job.queued
+        if job.state == "done" and not job.found:
+            self.log(f"⚠ Found no tracks in the {job.label}.")
+        elif job.state == "done":
+            queued = f", {job.queued} queued for retry" if job.queued else ""
+            self.log(f"💚 Liked {done} track(s) from the {job.label} ({job.already_saved} already liked{queued}).")
+            self.notify(f"💚 Liked {done} track(s) from the {job.label}")
+        elif job.state == "cancelled" and job.to_save:
+            self.log(f"⏹ Stopped liking the {job.label} after {done} of {job.to_save} track(s).")
+        elif job.state == "cancelled":
+            self.log(f"⏹ Stopped liking the {job.label}.")
+        elif isinstance(job.error, SpotifyError) and job.error.status in (401, 403):
+            self.log(f"⚠ Liking the {job.label} needs re-authorisation. Click Authorise to grant access.")
+        else:
+            self.log(f"❌ Could not like the {job.label}: {job.error}")
+
+    # === HOTKEYS ===
+    def hotkey_actions(self):
+        """{hotkey: callback} for the like hotkey plus every entry of the "hotkeys" setting.
+
+        "hotkeys" maps a hotkey to "like", "like_bulk:<album|queue|recent>",
+        "playlist_add:<playlist>" or "playlist_remove:<playlist>", where the
+        playlist is a name or id. Callbacks only queue work, so they are safe
+        to call from the keyboard hook.
+        """
+        actions = {self.store.get("hotkey", "ctrl+alt+l"): self.press}
+        for hotkey, action in (self.store.get("hotkeys") or {}).items():
+            callback = self.action_callback(action)
+            if callback is None:
+                print(f"[WARN] Unknown hotkey action {action!r} for {hotkey}")
+            else:
+                actions[hotkey] = callback
+        return actions
+
+    def action_callback(self, action):
+        name, _, target = action.partition(":")
+        if name == "like":
+            return self.press
+        if name == "like_bulk" and target in BULK_SOURCES:
+            return lambda: self.scheduler.submit(self.like_bulk, target)
+        if name in ("playlist_add", "playlist_remove") and target:
+            op = name[len("playlist_"):]
+            return lambda: self.scheduler.submit(self.playlist_action, op, target)
+        return None
+
+    # === PLAYLISTS ===
+    def playlist_action(self, op, target):
+        """Add the playing track to (op="add") or remove it from (op="remove") the playlist `target`.
+
+        With the directory and the playlist's track ids cached, this is the
+        currently-playing lookup plus one write; a track already in (or
+        missing from) the playlist costs no write at all.
+        """
+        with self._playlist_lock:
+            try:
+                return self._playlist_action(op, target)
+            except TokenUnavailable:
+                return {"done": False, "reason": "token"}
+            except SpotifyError as e:
+                if e.status in (401, 403):
+                    self.log("⚠ Playlist hotkeys need re-authorisation (playlist scopes). Click Authorise to enable them.")
+                else:
+                    self.log(f"❌ Playlist update failed: {e}")
+                return {"done": False, "reason": str(e)}
+            except Exception as e:
+                self.log(f"❌ Playlist update failed: {e}")
+                return {"done": False, "reason": str(e)}
+
+    def _playlist_action(self, op, target):
+        playlist = self.playlists.find(target)
+        if playlist is None:
+            self.log(f"⚠ No playlist called {target!r}.")
+            return {"done": False, "reason": "unknown playlist"}
+        track = self.resolve_current_track()
+        if not track:
+            return {"done": False, "reason": "nothing playing"}
+        members = self.playlists.members(playlist["id"])
+        name = track_name(track)
+        if op == "add" and track["id"] in members:
+            self.log(f"📃 Already in {playlist['name']}: {name}")
+            return {"done": False, "reason": "already in playlist"}
+        if op == "remove" and track["id"] not in members:
+            self.log(f"📃 Not in {playlist['name']}: {name}")
+            return {"done": False, "reason": "not in playlist"}
+        headers = self.require_headers()
+        if op == "add":
+            with METRICS.span("stage.playlist_add"):
+                snapshot_id = self.spotify.add_to_playlist(headers, playlist["id"], [track["id"]])
+            self.playlists.added(playlist["id"], [track["id"]], snapshot_id)
+            self.log(f"➕ Added to {playlist['name']}: {name}")
+            self.notify(f"➕ Added to {playlist['name']}: {name}", group="playlist")
+        else:
+            with METRICS.span("stage.playlist_remove"):
+                snapshot_id = self.spotify.remove_from_playlist(headers, playlist["id"], [track["id"]])
+            self.playlists.removed(playlist["id"], [track["id"]], snapshot_id)
+            self.log(f"➖ Removed from {playlist['name']}: {name}")
+            self.notify(f"➖ Removed from {playlist['name']}: {name}", group="playlist")
+        return {"done": True, "playlist": playlist["name"], "track": track}
+
+    def _sync_playlists(self):
+        if not len(self.playlists) and not any(action.startswith("playlist_")
+                                               for action in (self.store.get("hotkeys") or {}).values()):
+            return  # nothing uses playlists yet; the first playlist hotkey loads the directory
+        try:
+            changed = self.playlists.refresh()
+            if changed:
+                self.log(f"📃 Playlist directory updated ({changed} new or changed, {len(self.playlists)} playlists).")
+        except SpotifyError as e:
+            if e.status in (401, 403):
+                self.log("⚠ Playlist hotkeys need re-authorisation (playlist scopes). Click Authorise to enable them.")
+                self._playlist_job.cancel()
+                return
+            print(f"[WARN] Playlist sync failed: {e}")
+        except Exception as e:
+            print(f"[WARN] Playlist sync failed: {e}")
+
+    # === LIKE HISTORY ===
+    def start_history(self):
+        if self.history is not None or not self.store.get("like_history", True):
+            return
+        try:
+            self.history = LikeHistory(self.history_file)
+        except Exception as e:
+            print(f"[WARN] Could not open like history: {e}")
+            return
+        self.history.start()
+        METRICS.gauge("history.dropped", lambda: self.history.dropped)
+
+    def record_history(self, action, tracks, source="hotkey"):
+        if self.history is not None:
+            self.history.record(action, tracks, source)
+
+    def _require_history(self):
+        if self.history is None:
+            raise RuntimeError("like history is turned off (like_history)")
+        return self.history
+
+    def recent_history(self, limit=50, action=None):
+        return self._require_history().recent(limit, action)
+
+    def search_history(self, text, limit=50):
+        return self._require_history().search(text, limit)
+
+    def history_stats(self, days=30):
+        return self._require_history().daily_stats(days)
+
+    def export_history(self, path=None, format="csv"):
+        """Write the like history to `path` (spotikey_history.csv/.jsonl in the data folder by default)."""
+        history = self._require_history()
+        history.flush()
+        path = path or os.path.join(self.appdata_dir, "spotikey_history." + format)
+        count = history.export(path, format)
+        self.log(f"📤 Exported {count} history row(s) to {path}")
+        return {"path": path, "rows": count}
+
+    # === LIBRARY INDEX ===
+    def fetch_saved_tracks_page(self, offset, limit):
+        return self.spotify.saved_tracks(self.require_headers(), offset, limit)
+
+    def _sync_library(self):
+        # Presses and bulk likes only consult the index while its last sync succeeded.
+        try:
+            added = self.library.sync(self.fetch_saved_tracks_page)
+        except SpotifyError as e:
+            self.actions.library = None
+            if e.status in (401, 403):
+                self.log("⚠ Library index needs re-authorisation (user-library-read). Click Authorise to enable it.")
+                self._library_job.cancel()
+                return
+            print(f"[WARN] Library sync failed: {e}")
+            return
+        except Exception as e:
+            self.actions.library = None
+            print(f"[WARN] Library sync failed: {e}")
+            return
+        self.actions.library = self.library
+        if added:
+            self.log(f"📚 Library index updated (+{added}, {len(self.library)} saved tracks).")
+
+    def start_library_index(self):
+        if self.library is not None or not self.store.get("library_index", True):
+            return
+        try:
+            self.library = LibraryIndex(self.library_file, workers=FETCH_WORKERS)
+        except Exception as e:
+            print(f"[WARN] Could not open library index: {e}")
+            return
+        self._library_job = self.scheduler.every(lambda: self.store.get("library_sync_interval", 1800),
+                                                 self._sync_library, background=True, first_delay=0)
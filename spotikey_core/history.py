@@ -0,0 +1,163 @@
+import csv
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from spotikey_core.metrics import METRICS
+
+COLUMNS = ("ts", "action", "track_id", "name", "artist", "album", "latency_ms", "source")
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+class LikeHistory:
+    """Indexed SQLite record of every like and unlike Spotikey has made.
+
+    record() only puts rows on a queue, so the hotkey path never waits on
+    the disk; a background thread writes whatever has queued up in one
+    transaction. Rows are indexed by time and track id, so recent items,
+    per-day stats and "did I like this?" stay quick with tens of thousands
+    of rows. The database runs in WAL mode, so queries and export() read
+    while the writer is busy.
+    """
+
+    def __init__(self, path, max_pending=10_000):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history (ts REAL NOT NULL, action TEXT NOT NULL, track_id TEXT NOT NULL, "
+                "name TEXT, artist TEXT, album TEXT, latency_ms REAL, source TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS history_ts ON history (ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS history_track ON history (track_id, ts)")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-history", daemon=True)
+            self._thread.start()
+
+    def record(self, action, tracks, source="hotkey"):
+        """Queue one row per track dict; only "id" is required.
+
+        "name", "artist" and "album" are stored when present, a "source" key
+        overrides `source`, and "pressed_at" (a perf_counter() time) gives the
+        press-to-confirmation latency.
+        """
+        now, confirmed = time.time(), time.perf_counter()
+        for track in tracks:
+            pressed_at = track.get("pressed_at")
+            latency_ms = (confirmed - pressed_at) * 1000 if pressed_at is not None else None
+            row = (now, action, track["id"], track.get("name") or None, track.get("artist") or None,
+                   track.get("album") or None, latency_ms, track.get("source") or source)
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self, timeout=2.0):
+        """Block until everything recorded so far is in the database."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    # === QUERIES ===
+    def recent(self, limit=50, action=None):
+        """Newest rows first, as dicts; `action` narrows to "like" or "unlike"."""
+        sql = "SELECT * FROM history"
+        params = []
+        if action:
+            sql += " WHERE action = ?"
+            params.append(action)
+        return self._query(sql + " ORDER BY ts DESC LIMIT ?", params + [limit])
+
+    def search(self, text, limit=50):
+        """Rows whose track name, artist or album contains `text` (case-insensitive), newest first."""
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self._query(
+            "SELECT * FROM history WHERE name LIKE ?1 ESCAPE '\\' OR artist LIKE ?1 ESCAPE '\\' "
+            "OR album LIKE ?1 ESCAPE '\\' ORDER BY ts DESC LIMIT ?2", [pattern, limit])
+
+    def track(self, track_id):
+        """Every row for one track id, oldest first."""
+        return self._query("SELECT * FROM history WHERE track_id = ? ORDER BY ts", [track_id])
+
+    def between(self, start, end, limit=1000):
+        """Rows with start <= ts < end (Unix times), oldest first."""
+        return self._query("SELECT * FROM history WHERE ts >= ? AND ts < ? ORDER BY ts LIMIT ?", [start, end, limit])
+
+    def daily_stats(self, days=30):
+        """[{"day", "liked", "unliked", "avg_latency_ms"}] for the last `days` local days, oldest first."""
+        since = time.time() - days * 86400
+        return self._query(
+            "SELECT date(ts, 'unixepoch', 'localtime') AS day, "
+            "SUM(action = 'like') AS liked, SUM(action = 'unlike') AS unliked, "
+            "ROUND(AVG(latency_ms), 1) AS avg_latency_ms "
+            "FROM history WHERE ts >= ? GROUP BY day ORDER BY day", [since])
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def export(self, path, fmt="csv"):
+        """Write the whole history, oldest first, as CSV or JSON lines; returns the row count.
+
+        Streams from a separate read connection, so recording carries on meanwhile.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"unknown export format {fmt!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+        count = 0
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute("SELECT " + ", ".join(COLUMNS) + " FROM history ORDER BY ts")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                if fmt == "jsonl":
+                    for row in rows:
+                        f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+                        count += 1
+                else:
+                    writer = csv.writer(f)
+                    writer.writerow(COLUMNS)
+                    for row in rows:
+                        writer.writerow(row)
+                        count += 1
+        finally:
+            conn.close()
+        return count
+
+    def _query(self, sql, params):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    # === WRITER ===
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 500:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            rows = [item for item in batch if not isinstance(item, threading.Event)]
+            if rows:
+                self._write(rows)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, rows):
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany("INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            METRICS.incr("history.rows", len(rows))
+        except sqlite3.Error as e:
+            print(f"[WARN] Could not write like history: {e}")
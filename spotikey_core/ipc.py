@@ -0,0 +1,160 @@
+import json
+import os
+import secrets
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from spotikey_core.metrics import METRICS
+
+FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+AUTHKEY_NAME = "spotikey_ipc.key"
+
+
+class CommandError(Exception):
+    """The engine rejected a command or failed while running it."""
+
+
+def default_address(appdata_dir, name="spotikey"):
+    """A per-user named pipe on Windows, a socket file in the data folder elsewhere."""
+    if FAMILY == "AF_PIPE":
+        return rf"\\.\pipe\{name}-" + os.getenv("USERNAME", "user")
+    return os.path.join(appdata_dir, name + ".sock")
+
+
+def load_authkey(path):
+    """Shared secret for the IPC handshake, created on first use and readable only by this user."""
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+        if key:
+            return key
+    except OSError:
+        pass
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def ipc_endpoint(appdata_dir, name="spotikey"):
+    return default_address(appdata_dir, name), load_authkey(os.path.join(appdata_dir, AUTHKEY_NAME))
+
+
+def start_command_server(engine):
+    """Serve engine.commands on the engine's data-folder endpoint; returns the started CommandServer."""
+    address, authkey = ipc_endpoint(engine.appdata_dir)
+    server = CommandServer(address, authkey, engine.commands)
+    server.start()
+    return server
+
+
+class CommandServer:
+    """Serves engine commands to local clients over a Unix socket or named pipe.
+
+    Each request is one JSON message {"cmd": name, "args": {...}} answered
+    with {"ok": true, "result": ...} or {"ok": false, "error": "..."}. A
+    client may send any number of requests on one connection. The
+    multiprocessing handshake with `authkey` keeps other local users out, and
+    messages are JSON rather than pickles so a client can't run code here.
+    """
+
+    def __init__(self, address, authkey, handlers):
+        self.address = address
+        self.authkey = authkey
+        self.handlers = handlers
+        self._listener = None
+        self._thread = None
+
+    def start(self):
+        if self._listener is not None:
+            return
+        if FAMILY == "AF_UNIX" and os.path.exists(self.address):
+            if _answers(self.address, self.authkey):
+                raise OSError(f"another Spotikey is already listening on {self.address}")
+            os.unlink(self.address)  # left behind by a process that didn't exit cleanly
+        self._listener = Listener(self.address, FAMILY, authkey=self.authkey)
+        self._thread = threading.Thread(target=self._accept_loop, name="spotikey-ipc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+
+    def _accept_loop(self):
+        while self._listener is not None:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                if self._listener is None:
+                    return
+                print(f"[WARN] IPC connection rejected: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    raw = conn.recv_bytes(64 * 1024)
+                except (EOFError, OSError):
+                    return
+                conn.send_bytes(json.dumps(self._handle(raw), default=str).encode("utf-8"))
+
+    def _handle(self, raw):
+        METRICS.incr("ipc.requests")
+        try:
+            request = json.loads(raw)
+            handler = self.handlers.get(request.get("cmd"))
+            if handler is None:
+                return {"ok": False, "error": f"unknown command: {request.get('cmd')}"}
+            with METRICS.span("stage.ipc"):
+                return {"ok": True, "result": handler(**(request.get("args") or {}))}
+        except Exception as e:
+            METRICS.incr("ipc.errors")
+            return {"ok": False, "error": str(e)}
+
+
+class CommandClient:
+    """Keeps one connection to a running engine; use as a context manager or call close()."""
+
+    def __init__(self, address, authkey, timeout=5.0):
+        self.timeout = timeout
+        self._conn = Client(address, FAMILY, authkey=authkey)
+
+    def call(self, cmd, **args):
+        self._conn.send_bytes(json.dumps({"cmd": cmd, "args": args}).encode("utf-8"))
+        if not self._conn.poll(self.timeout):
+            raise TimeoutError(f"no reply to {cmd!r} within {self.timeout}s")
+        reply = json.loads(self._conn.recv_bytes())
+        if not reply.get("ok"):
+            raise CommandError(reply.get("error", "command failed"))
+        return reply.get("result")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_command(address, authkey, cmd, timeout=5.0, **args):
+    """One-shot request to a running engine."""
+    with CommandClient(address, authkey, timeout) as client:
+        return client.call(cmd, **args)
+
+
+def _answers(address, authkey):
+    try:
+        Client(address, FAMILY, authkey=authkey).close()
+    except AuthenticationError:
+        pass  # something is listening, just with another key
+    except OSError:
+        return False
+    return True
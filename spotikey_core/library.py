@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+PAGE_SIZE = 50
+
+
+def utc_now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class LibraryIndex:
+    """Local index of the track ids saved in the user's library.
+
+    Ids live in an in-memory set for O(1) lookups and are persisted to a
+    small SQLite table, so startup is one SELECT even for large libraries.
+    The first sync pages through /me/tracks concurrently; later syncs only
+    read the newest pages until they reach tracks already indexed.
+    """
+
+    def __init__(self, path, workers=4):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS saved_tracks (id TEXT PRIMARY KEY, added_at TEXT) WITHOUT ROWID")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._ids = {row[0] for row in self._conn.execute("SELECT id FROM saved_tracks")}
+
+    def __contains__(self, track_id):
+        return track_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, ids, added_at=None):
+        added_at = added_at or utc_now_iso()
+        rows = [(track_id, added_at) for track_id in ids]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO saved_tracks VALUES (?, ?)", rows)
+            self._ids.update(track_id for track_id, _ in rows)
+
+    def remove(self, ids):
+        ids = list(ids)
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM saved_tracks WHERE id = ?", [(i,) for i in ids])
+            self._ids.difference_update(ids)
+
+    # === SYNC ===
+    def sync(self, fetch_page):
+        """Bring the index up to date. fetch_page(offset, limit) -> (items, total).
+
+        Returns the number of tracks added to the index.
+        """
+        last = self._get_meta("last_added_at")
+        if last is None:
+            return self.full_sync(fetch_page)
+        new_items = []
+        offset = 0
+        while True:
+            items, total = fetch_page(offset, PAGE_SIZE)
+            reached_known = False
+            for track_id, added_at in items:
+                if track_id in self._ids and added_at <= last:
+                    reached_known = True
+                    break
+                if track_id not in self._ids:
+                    new_items.append((track_id, added_at))
+            offset += PAGE_SIZE
+            if reached_known or not items or offset >= total:
+                break
+        self._store(new_items, last)
+        if total != len(self._ids):
+            # Tracks were removed outside Spotikey; only a full pass can see that.
+            return self.full_sync(fetch_page)
+        return len(new_items)
+
+    def full_sync(self, fetch_page):
+        items, total = fetch_page(0, PAGE_SIZE)
+        offsets = range(PAGE_SIZE, total, PAGE_SIZE)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for page, _ in pool.map(lambda offset: fetch_page(offset, PAGE_SIZE), offsets):
+                items.extend(page)
+        before = len(self._ids)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM saved_tracks")
+            self._conn.executemany("INSERT OR IGNORE INTO saved_tracks VALUES (?, ?)", items)
+            self._ids = {track_id for track_id, _ in items}
+            if items:
+                self._set_meta("last_added_at", max(added_at for _, added_at in items))
+            else:
+                self._set_meta("last_added_at", "")
+        return max(0, len(self._ids) - before)
+
+    def _store(self, items, last):
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO saved_tracks VALUES (?, ?)", items)
+            self._ids.update(track_id for track_id, _ in items)
+            self._set_meta("last_added_at", max([last] + [added_at for _, added_at in items]))
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
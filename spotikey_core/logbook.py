@@ -0,0 +1,169 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+_CLEAR = object()
+
+
+class LogBook:
+    """Non-blocking log sink for spotikey.log.
+
+    write() only appends to a bounded in-memory ring and a queue; a
+    background thread batches queued lines into the file, rotating it by size
+    (`max_bytes`) or age (`max_age` seconds). With `structured=True` lines are
+    written as JSON objects ({"ts", "msg"}) instead of plain text.
+    """
+
+    def __init__(self, path, max_bytes=1_000_000, backups=3, max_age=0, structured=False,
+                 ring_size=500, max_pending=10_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.max_age = max_age
+        self.structured = structured
+        self.recent = deque(maxlen=ring_size)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._file = None
+        self._opened_at = None
+        self._thread = None
+        self.recent.extend(self.read_tail(ring_size))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-log", daemon=True)
+            self._thread.start()
+
+    def write(self, msg):
+        self.recent.append(msg)
+        try:
+            self._queue.put_nowait((time.time(), msg))
+        except queue.Full:
+            self.dropped += 1
+
+    def clear(self):
+        self.recent.clear()
+        self._queue.put(_CLEAR)
+
+    def flush(self, timeout=2.0):
+        """Block until everything queued so far has reached the file."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    # === READING ===
+    def read_tail(self, count):
+        """Return the last `count` messages in the file without reading all of it."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                pos, data = end, b""
+                while pos > 0 and data.count(b"\n") <= count:
+                    step = min(8192, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        except OSError:
+            return []
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if pos > 0:
+            lines = lines[1:]  # first line may be cut in half
+        return [self.parse_line(line) for line in lines[-count:] if line.strip()]
+
+    @staticmethod
+    def parse_line(line):
+        line = line.rstrip("\n")
+        if line.startswith("{"):
+            try:
+                return json.loads(line)["msg"]
+            except (ValueError, KeyError, TypeError):
+                pass
+        return line
+
+    # === WRITER ===
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 500:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            lines, waiters = [], []
+            for item in batch:
+                if item is _CLEAR:
+                    lines = []
+                    self._truncate()
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(self._format(*item))
+            if lines:
+                self._write_lines(lines)
+            for waiter in waiters:
+                waiter.set()
+
+    def _format(self, ts, msg):
+        if self.structured:
+            stamp = datetime.fromtimestamp(ts).isoformat(timespec="milliseconds")
+            return json.dumps({"ts": stamp, "msg": msg}, ensure_ascii=False) + "\n"
+        return msg + "\n"
+
+    def _write_lines(self, lines):
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write("".join(lines))
+            self._file.flush()
+            if self._should_rotate():
+                self._rotate()
+        except OSError as e:
+            print(f"[WARN] Could not write log file: {e}")
+            self._close()
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            self._opened_at = os.path.getctime(self.path)
+        except OSError:
+            self._opened_at = time.time()
+
+    def _close(self):
+        if self._file:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self._opened_at >= self.max_age
+
+    def _rotate(self):
+        self._close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+        self._opened_at = time.time()
+
+    def _truncate(self):
+        self._close()
+        try:
+            open(self.path, "w").close()
+        except OSError as e:
+            print(f"[WARN] Could not clear log file: {e}")
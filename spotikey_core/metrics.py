@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+
+class Histogram:
+    """Latency samples for one stage; percentiles come from the most recent `size` samples.
+
+    Samples live in a preallocated ring of C doubles, so a histogram's memory
+    is fixed from the start (8 bytes a sample) instead of growing until full.
+    """
+
+    def __init__(self, size=2048):
+        self.samples = array("d", bytes(8 * size))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples[:min(self.count, len(self.samples))])
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": self.max * 1000,
+        }
+
+
+class Metrics:
+    """In-process counters, gauges and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self.started_at = time.time()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block into the `name` histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def gauge(self, name, read):
+        """Register a callable sampled whenever a snapshot is taken."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: h.summary() for name, h in self._histograms.items()}
+            gauges = dict(self._gauges)
+        values = {}
+        for name, read in gauges.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                values[name] = f"error: {e}"
+        return {
+            "uptime_s": time.time() - self.started_at,
+            "counters": counters,
+            "gauges": values,
+            "histograms": histograms,
+        }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class PhaseTimer:
+    """Records how long each startup phase took, relative to `started`. Marks are free when disabled."""
+
+    def __init__(self, started, enabled=False):
+        self.started = started
+        self.enabled = enabled
+        self.phases = []
+        self._last = started
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, now - self.started))
+        self._last = now
+
+    def report(self):
+        lines = [f"{'phase':<28}{'took ms':>10}{'at ms':>10}"]
+        for phase, took, at in self.phases:
+            lines.append(f"{phase:<28}{took * 1000:>10.1f}{at * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
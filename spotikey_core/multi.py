@@ -0,0 +1,335 @@
+"""Many Spotify accounts in one process, on asyncio.
+
+Every account gets its own token lifecycle, rate-limit bucket and press
+queue, but all of them share one aiohttp connection pool and one event
+loop. An idle account is a small slotted object with no task or thread
+of its own, so memory grows flatly with the number of accounts.
+"""
+import asyncio
+import heapq
+import json
+import random
+import time
+from collections import deque
+
+import aiohttp
+
+from spotikey_core.api import SpotifyError, API_BASE_URL, ACCOUNTS_BASE_URL, error_message, is_transient, parse_now_playing
+from spotikey_core.metrics import METRICS
+
+
+class AsyncRateLimiter:
+    """Token bucket for one account; callers wait on the event loop rather than a thread."""
+
+    __slots__ = ("rate", "burst", "_tokens", "_updated", "_paused_until")
+
+    def __init__(self, rate=5.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = self._paused_until - now
+            if wait <= 0:
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AsyncSpotifyClient:
+    """The SpotifyClient calls Spotikey needs, over a shared aiohttp session."""
+
+    def __init__(self, session, api_base=API_BASE_URL, accounts_base=ACCOUNTS_BASE_URL):
+        self.session = session
+        self.api_base = api_base.rstrip("/")
+        self.accounts_base = accounts_base.rstrip("/")
+
+    async def _request(self, limiter, method, url, **kwargs):
+        await limiter.acquire()
+        METRICS.incr("http.requests")
+        try:
+            with METRICS.span("http." + method.lower()):
+                async with self.session.request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    status, headers = response.status, response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            METRICS.incr("http.network_errors")
+            raise
+        decoded = None
+        if body:
+            try:
+                decoded = json.loads(body)
+            except ValueError:
+                pass
+        if status >= 400:
+            METRICS.incr("http.429" if status == 429 else "http.errors")
+            try:
+                retry_after = float(headers["Retry-After"])
+            except (KeyError, ValueError):
+                retry_after = None
+            if status == 429:
+                limiter.pause(retry_after or 1.0)
+            raise SpotifyError(status, error_message(decoded), retry_after)
+        return decoded
+
+    async def request_token(self, limiter, form):
+        try:
+            return await self._request(limiter, "POST", self.accounts_base + "/api/token", data=form) or {}
+        except SpotifyError as e:
+            if is_transient(e):
+                raise
+            return {}
+
+    async def currently_playing(self, limiter, headers):
+        body = await self._request(limiter, "GET", self.api_base + "/me/player/currently-playing",
+                                   headers=headers, params={"additional_types": "track"})
+        return parse_now_playing(body)
+
+    async def save_tracks(self, limiter, headers, ids):
+        await self._request(limiter, "PUT", self.api_base + "/me/tracks", headers=headers, json={"ids": list(ids)})
+
+    async def remove_tracks(self, limiter, headers, ids):
+        await self._request(limiter, "DELETE", self.api_base + "/me/tracks", headers=headers, json={"ids": list(ids)})
+
+
+class AccountContext:
+    """Per-account state: credentials, token, rate-limit budget and pending presses."""
+
+    __slots__ = ("account_id", "client_id", "client_secret", "token_info", "limiter", "pending", "worker",
+                 "refreshing", "refresh_due", "failures", "last_liked")
+
+    def __init__(self, account_id, client_id, client_secret="", token_info=None, rate=5.0, burst=10, max_depth=16):
+        self.account_id = account_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_info = dict(token_info or {})
+        self.limiter = AsyncRateLimiter(rate, burst)
+        self.pending = deque(maxlen=max_depth)
+        self.worker = None
+        self.refreshing = None
+        self.refresh_due = None
+        self.failures = 0
+        self.last_liked = (None, 0.0)
+
+    def remaining(self):
+        return self.token_info.get("expires_at", 0) - time.time()
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token_info['access_token']}", "Content-Type": "application/json"}
+
+
+class MultiAccountEngine:
+    """Serves hotkey-style presses for many accounts from one event loop.
+
+    press() may only be called on the loop; other threads use
+    press_threadsafe(). A single refresher task keeps every token fresh
+    `margin` seconds ahead of expiry from a heap of due times, instead of
+    one timer per account, and a press whose token has already lapsed
+    refreshes it first (one refresh in flight per account). Outcomes go to
+    `on_result(account_id, outcome, detail)` with outcome one of "liked",
+    "already_liked", "nothing_playing" or "error"; refreshed tokens go to
+    `on_token(account_id, token_info)` so the caller can persist them.
+    """
+
+    def __init__(self, api_base=API_BASE_URL, accounts_base=ACCOUNTS_BASE_URL, pool_size=64, timeout=10,
+                 margin=120, jitter=30, retry_base=5, retry_max=300, dedupe_ttl=10.0, on_result=None, on_token=None):
+        self.api_base = api_base
+        self.accounts_base = accounts_base
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.margin = margin
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.dedupe_ttl = dedupe_ttl
+        self.on_result = on_result
+        self.on_token = on_token
+        self.accounts = {}
+        self.client = None
+        self.loop = None
+        self._due = []
+        self._wake = None
+        self._refresher = None
+
+    # === LIFECYCLE ===
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size, keepalive_timeout=60)
+        session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.client = AsyncSpotifyClient(session, self.api_base, self.accounts_base)
+        self._wake = asyncio.Event()
+        self._refresher = asyncio.create_task(self._refresh_loop())
+        for ctx in self.accounts.values():
+            self._schedule_refresh(ctx)
+
+    async def close(self):
+        if self._refresher:
+            self._refresher.cancel()
+        workers = [ctx.worker for ctx in self.accounts.values() if ctx.worker]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self.client:
+            await self.client.session.close()
+
+    def add_account(self, account_id, client_id, client_secret="", token_info=None, rate=5.0, burst=10):
+        ctx = self.accounts[account_id] = AccountContext(account_id, client_id, client_secret, token_info, rate, burst)
+        if self.loop is not None:
+            self._schedule_refresh(ctx)
+        return ctx
+
+    def remove_account(self, account_id):
+        ctx = self.accounts.pop(account_id, None)
+        if ctx and ctx.worker:
+            ctx.worker.cancel()
+
+    # === PRESSES ===
+    def press(self, account_id):
+        """Queue a 'like whatever is playing' for one account. Must run on the loop."""
+        ctx = self.accounts[account_id]
+        if len(ctx.pending) == ctx.pending.maxlen:
+            METRICS.incr("multi.dropped")
+            return False
+        ctx.pending.append(time.perf_counter())
+        if ctx.worker is None:
+            ctx.worker = self.loop.create_task(self._drain(ctx))
+        return True
+
+    def press_threadsafe(self, account_id):
+        if account_id not in self.accounts:
+            raise ValueError(f"unknown account: {account_id}")
+        self.loop.call_soon_threadsafe(self.press, account_id)
+
+    def status(self, account_id=None):
+        if account_id is None:
+            return {
+                "accounts": len(self.accounts),
+                "busy": sum(1 for ctx in self.accounts.values() if ctx.worker),
+                "refreshes_scheduled": len(self._due),
+            }
+        ctx = self.accounts.get(account_id)
+        if ctx is None:
+            raise ValueError(f"unknown account: {account_id}")
+        return {
+            "account": account_id,
+            "token_valid": bool(ctx.token_info.get("access_token")) and ctx.remaining() > 0,
+            "token_remaining_s": ctx.remaining(),
+            "pending": len(ctx.pending),
+            "refresh_failures": ctx.failures,
+        }
+
+    async def _drain(self, ctx):
+        """Runs only while the account has presses queued; exits (and frees its task) when idle."""
+        try:
+            while ctx.pending:
+                first = ctx.pending[0]
+                presses = len(ctx.pending)
+                ctx.pending.clear()
+                if presses > 1:
+                    METRICS.incr("multi.coalesced", presses - 1)
+                await self._like_current(ctx)
+                METRICS.observe("multi.press.total", time.perf_counter() - first)
+        finally:
+            ctx.worker = None
+
+    async def _like_current(self, ctx):
+        try:
+            headers = await self._headers(ctx)
+            track = await self.client.currently_playing(ctx.limiter, headers)
+            if not track:
+                self._emit(ctx, "nothing_playing", None)
+                return
+            last_id, last_at = ctx.last_liked
+            if track["id"] == last_id and time.monotonic() - last_at < self.dedupe_ttl:
+                self._emit(ctx, "already_liked", track)
+                return
+            await self.client.save_tracks(ctx.limiter, headers, [track["id"]])
+            ctx.last_liked = (track["id"], time.monotonic())
+            self._emit(ctx, "liked", track)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            METRICS.incr("multi.errors")
+            self._emit(ctx, "error", e)
+
+    def _emit(self, ctx, outcome, detail):
+        if self.on_result:
+            self.on_result(ctx.account_id, outcome, detail)
+
+    # === TOKENS ===
+    async def _headers(self, ctx):
+        if not ctx.token_info.get("access_token") or ctx.remaining() <= 0:
+            if not await self.refresh(ctx):
+                raise SpotifyError(401, "token expired and refresh failed")
+        return ctx.headers()
+
+    async def refresh(self, ctx):
+        """Refresh one account's token, or wait for the refresh already in flight."""
+        if ctx.refreshing is None:
+            ctx.refreshing = self.loop.create_task(self._do_refresh(ctx))
+        return await asyncio.shield(ctx.refreshing)
+
+    async def _do_refresh(self, ctx):
+        ok = False
+        try:
+            refresh_token = ctx.token_info.get("refresh_token")
+            if refresh_token:
+                form = {"grant_type": "refresh_token", "refresh_token": refresh_token, "client_id": ctx.client_id}
+                if ctx.client_secret:
+                    form["client_secret"] = ctx.client_secret
+                data = await self.client.request_token(ctx.limiter, form)
+                if "access_token" in data:
+                    data.setdefault("refresh_token", refresh_token)
+                    data["expires_at"] = int(time.time()) + data.get("expires_in", 3600)
+                    ctx.token_info = data
+                    ok = True
+        except Exception as e:
+            print(f"[WARN] Token refresh failed for {ctx.account_id}: {e}")
+        finally:
+            METRICS.incr("token.refreshes" if ok else "token.refresh_failures")
+            ctx.failures = 0 if ok else ctx.failures + 1
+            ctx.refreshing = None
+        if ok and self.on_token:
+            self.on_token(ctx.account_id, ctx.token_info)
+        self._schedule_refresh(ctx)
+        return ok
+
+    def _schedule_refresh(self, ctx):
+        if not ctx.token_info.get("refresh_token"):
+            ctx.refresh_due = None
+            return
+        if ctx.failures:
+            delay = min(self.retry_max, self.retry_base * 2 ** (ctx.failures - 1)) * random.uniform(0.8, 1.2)
+        else:
+            delay = ctx.remaining() - self.margin - random.uniform(0, self.jitter)
+        ctx.refresh_due = time.monotonic() + max(0.0, delay)
+        heapq.heappush(self._due, (ctx.refresh_due, ctx.account_id))
+        self._wake.set()
+
+    async def _refresh_loop(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            while self._due and self._due[0][0] <= now:
+                due, account_id = heapq.heappop(self._due)
+                ctx = self.accounts.get(account_id)
+                # Entries are never removed from the heap, only superseded by a later refresh_due.
+                if ctx is not None and ctx.refresh_due == due and ctx.refreshing is None:
+                    ctx.refresh_due = None
+                    ctx.refreshing = self.loop.create_task(self._do_refresh(ctx))
+            timeout = self._due[0][0] - now if self._due else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from spotikey_core.metrics import METRICS
+
+
+class NullBackend:
+    """Discards every toast."""
+
+    def show(self, title, message):
+        pass
+
+
+class RecordingBackend:
+    """Counts toasts and keeps (time, title, message) for the last `keep`; for tests and benchmarks."""
+
+    def __init__(self, keep=100):
+        self.count = 0
+        self.shown = deque(maxlen=keep)
+
+    def show(self, title, message):
+        self.count += 1
+        self.shown.append((time.time(), title, message))
+
+
+class ToastBackend:
+    """Windows toasts via win10toast. show() blocks for `duration`, so toasts never overlap."""
+
+    def __init__(self, icon_path=None, duration=3):
+        self.icon_path = icon_path
+        self.duration = duration
+        self._toaster = None
+
+    def show(self, title, message):
+        if self._toaster is None:
+            from win10toast import ToastNotifier
+            self._toaster = ToastNotifier()
+        self._toaster.show_toast(title, message, duration=self.duration, threaded=False, icon_path=self.icon_path)
+
+
+class NotificationDispatcher:
+    """Shows toasts one at a time from a single worker thread.
+
+    notify() never blocks: it drops the toast if `max_pending` are already
+    waiting. The worker waits `window` seconds after the first toast of a
+    burst, then collapses everything queued: toasts sharing a `group` become
+    one, using `summaries[group]` (formatted with `count`) when more than one
+    was merged, and exact duplicates are shown once. Toasts that waited longer
+    than `max_age` seconds (e.g. behind a slow backend) are dropped as stale.
+    """
+
+    def __init__(self, backend, enabled=None, summaries=None, window=0.3, max_age=10.0, max_pending=32):
+        self.backend = backend
+        self.enabled = enabled or (lambda: True)
+        self.summaries = summaries or {}
+        self.window = window
+        self.max_age = max_age
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-notify", daemon=True)
+            self._thread.start()
+
+    def notify(self, title, message, group=None, count=1):
+        if not self.enabled():
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), title, message, group, count))
+        except queue.Full:
+            METRICS.incr("notify.dropped")
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=2.0):
+        """Block until everything queued so far has been shown (or dropped)."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    # === WORKER ===
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while not isinstance(batch[-1], threading.Event):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            for title, message in self._collapse([item for item in batch if not isinstance(item, threading.Event)]):
+                self._show(title, message)
+            for waiter in waiters:
+                waiter.set()
+
+    def _collapse(self, items):
+        now = time.monotonic()
+        merged = {}
+        for queued_at, title, message, group, count in items:
+            if now - queued_at > self.max_age:
+                METRICS.incr("notify.stale")
+                continue
+            key = ("group", group) if group is not None else ("message", title, message)
+            if key in merged:
+                METRICS.incr("notify.collapsed")
+                entry = merged.pop(key)
+                count += entry[2]
+            merged[key] = (title, message, count, group)
+        toasts = []
+        for title, message, count, group in merged.values():
+            if count > 1 and group in self.summaries:
+                message = self.summaries[group].format(count=count)
+            toasts.append((title, message))
+        return toasts
+
+    def _show(self, title, message):
+        try:
+            with METRICS.span("stage.notify"):
+                self.backend.show(title, message)
+            METRICS.incr("notify.shown")
+        except Exception as e:
+            print(f"[WARN] Notification failed: {e}")
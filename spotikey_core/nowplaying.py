@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+
+
+class NowPlayingTracker:
+    """Keeps the currently playing track warm in memory so a like is a single PUT.
+
+    Polls adaptively: while a track plays the next poll is timed to land just
+    after the predicted end of the track (progress_ms/duration_ms), and
+    paused or idle playback backs off towards `idle_interval`. Polls are
+    capped at `polls_per_minute` to stay inside the API rate limits.
+    """
+
+    def __init__(self, fetch, playing_interval=5.0, paused_interval=15.0, idle_interval=60.0,
+                 polls_per_minute=12, max_age=10.0, boundary_guard=1.5):
+        self.fetch = fetch
+        self.playing_interval = playing_interval
+        self.paused_interval = paused_interval
+        self.idle_interval = idle_interval
+        self.polls_per_minute = polls_per_minute
+        self.max_age = max_age
+        self.boundary_guard = boundary_guard
+        self._track = None
+        self._fetched_at = 0.0
+        self._idle_polls = 0
+        self._polls = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="spotikey-nowplaying", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread = None
+
+    def current(self):
+        """Return the cached track if it can still be trusted, otherwise None."""
+        with self._lock:
+            track, fetched_at = self._track, self._fetched_at
+        if not track:
+            return None
+        age = time.monotonic() - fetched_at
+        if age > self.max_age:
+            return None
+        if track.get("is_playing") and self._ms_left(track, age) < self.boundary_guard * 1000:
+            return None
+        return track
+
+    def update(self, track):
+        """Record a fresh currently-playing result (e.g. from a live fallback GET)."""
+        with self._lock:
+            self._track = track
+            self._fetched_at = time.monotonic()
+            if track:
+                self._idle_polls = 0
+        self._wake.set()
+
+    def _ms_left(self, track, age):
+        duration = track.get("duration_ms")
+        progress = track.get("progress_ms")
+        if duration is None or progress is None:
+            return float("inf")
+        return duration - progress - age * 1000
+
+    def _next_delay(self, track):
+        if track and track.get("is_playing"):
+            self._idle_polls = 0
+            left = self._ms_left(track, 0) / 1000.0
+            return max(0.5, min(self.playing_interval, left + 0.5))
+        self._idle_polls += 1
+        base = self.paused_interval if track else self.playing_interval
+        return min(self.idle_interval, base * 2 ** (self._idle_polls - 1))
+
+    def _budget_delay(self):
+        now = time.monotonic()
+        while self._polls and now - self._polls[0] >= 60:
+            self._polls.popleft()
+        if len(self._polls) < self.polls_per_minute:
+            return 0.0
+        return 60 - (now - self._polls[0])
+
+    def _run(self):
+        delay = 0.0
+        while not self._stopped.is_set():
+            if self._wake.wait(delay):
+                self._wake.clear()
+                if self._stopped.is_set():
+                    return
+                # A live result just arrived; schedule from that instead of polling now.
+                with self._lock:
+                    track = self._track
+                delay = self._next_delay(track)
+                continue
+            budget = self._budget_delay()
+            if budget > 0:
+                delay = budget
+                continue
+            self._polls.append(time.monotonic())
+            try:
+                track = self.fetch()
+            except Exception as e:
+                print(f"[WARN] Now-playing poll failed: {e}")
+                self._idle_polls += 1
+                delay = min(self.idle_interval, self.playing_interval * 2 ** self._idle_polls)
+                continue
+            with self._lock:
+                self._track = track
+                self._fetched_at = time.monotonic()
+            delay = self._next_delay(track)
@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import secrets
+import threading
+from urllib.parse import urlencode
+
+
+class LoginCancelled(Exception):
+    """The pending login was cancelled (e.g. the user started a new one)."""
+
+
+class LoginTimeout(Exception):
+    """No authorisation code arrived before the timeout."""
+
+
+class LocalServer:
+    """Serves a WSGI app on demand with an explicit start/stop lifecycle.
+
+    Unlike app.run(), the server can be shut down and started again, so a
+    second login doesn't try to rebind a port that is still held.
+    """
+
+    def __init__(self, app_factory, host, port, ssl_context=None):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def start(self):
+        from werkzeug.serving import make_server
+        with self._lock:
+            if self._server is not None:
+                return
+            self._server = make_server(self.host, self.port, self.app_factory(), threaded=True,
+                                       ssl_context=self.ssl_context)
+            self._thread = threading.Thread(target=self._server.serve_forever, name="spotikey-http", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            server, thread = self._server, self._thread
+            self._server = self._thread = None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            thread.join(timeout=5)
+
+
+class LoginAttempt:
+    """One pending authorisation: its CSRF state, PKCE verifier and completion event."""
+
+    def __init__(self):
+        self.state = secrets.token_urlsafe(16)
+        self.code_verifier = secrets.token_urlsafe(64)[:128]
+        digest = hashlib.sha256(self.code_verifier.encode("ascii")).digest()
+        self.code_challenge = base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def authorize_url(self, accounts_base, client_id, redirect_uri, scope, use_pkce):
+        params = {
+            "client_id": client_id,
+            "response_type": "code",
+            "redirect_uri": redirect_uri,
+            "scope": scope,
+            "state": self.state,
+            "show_dialog": "true",
+        }
+        if use_pkce:
+            params["code_challenge_method"] = "S256"
+            params["code_challenge"] = self.code_challenge
+        return accounts_base + "/authorize?" + urlencode(params)
+
+    def complete(self, result=None, error=None):
+        if self._done.is_set():
+            return
+        self._result, self._error = result, error
+        self._done.set()
+
+    def cancel(self):
+        self.complete(error=LoginCancelled("Login cancelled."))
+
+    def wait(self, timeout=None):
+        """Block until the callback completes this attempt; returns its result."""
+        if not self._done.wait(timeout):
+            self.cancel()
+            raise LoginTimeout(f"No authorisation received within {int(timeout)}s.")
+        if self._error is not None:
+            raise self._error
+        return self._result
@@ -0,0 +1,158 @@
+import json
+import os
+import random
+import threading
+import time
+
+MAX_IDS_PER_REQUEST = 50
+
+
+class QueuedForRetry(Exception):
+    """A library mutation could not be sent now and was parked in the outbox."""
+
+    def __init__(self, count, cause=None):
+        super().__init__(f"{count} track(s) queued for retry" + (f" after: {cause}" if cause else ""))
+        self.count = count
+        self.cause = cause
+
+
+class MutationOutbox:
+    """Write-ahead queue of library mutations that failed to send.
+
+    Each mutation is appended (and fsynced) to a JSON-lines file before it is
+    acknowledged, so a backlog survives restarts. A worker replays entries in
+    order, merging consecutive entries of the same kind into requests of up to
+    50 ids, honouring Retry-After on 429 and backing off exponentially on
+    other transient failures.
+    """
+
+    def __init__(self, path, send, is_transient, on_sent=None, on_dropped=None,
+                 retry_base=2.0, retry_max=300.0):
+        self.path = path
+        self.send = send
+        self.is_transient = is_transient
+        self.on_sent = on_sent
+        self.on_dropped = on_dropped
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._entries = []
+        self._seq = 0
+        self._torn = False
+        self._thread = None
+        self._load()
+
+    def pending(self):
+        return len(self._entries)
+
+    def add(self, op, ids):
+        """Append track ids to the outbox for `op` ("save" or "remove")."""
+        ids = list(ids)
+        with self._lock:
+            lines = []
+            for start in range(0, len(ids), MAX_IDS_PER_REQUEST):
+                self._seq += 1
+                entry = {"seq": self._seq, "op": op, "ids": ids[start:start + MAX_IDS_PER_REQUEST]}
+                self._entries.append(entry)
+                lines.append(entry)
+            self._append(lines)
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spotikey-outbox", daemon=True)
+            self._thread.start()
+            if self._entries:
+                self._wake.set()
+
+    # === WORKER ===
+    def _run(self):
+        failures = 0
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while self._entries:
+                op, entries, ids = self._next_batch()
+                try:
+                    self.send(op, ids)
+                except Exception as e:
+                    if not self.is_transient(e):
+                        self._ack(entries)
+                        if self.on_dropped:
+                            self.on_dropped(op, ids, e)
+                        continue
+                    failures += 1
+                    delay = getattr(e, "retry_after", None)
+                    if not delay:
+                        delay = min(self.retry_max, self.retry_base * 2 ** (failures - 1))
+                        delay *= random.uniform(0.8, 1.2)
+                    time.sleep(delay)
+                    continue
+                failures = 0
+                self._ack(entries)
+                if self.on_sent:
+                    self.on_sent(op, ids)
+
+    def _next_batch(self):
+        with self._lock:
+            op = self._entries[0]["op"]
+            entries, ids = [], []
+            for entry in self._entries:
+                if entry["op"] != op:
+                    break
+                new = [i for i in entry["ids"] if i not in ids]
+                if entries and len(ids) + len(new) > MAX_IDS_PER_REQUEST:
+                    break
+                entries.append(entry)
+                ids.extend(new)
+        return op, entries, ids
+
+    def _ack(self, entries):
+        done = {entry["seq"] for entry in entries}
+        with self._lock:
+            self._entries = [e for e in self._entries if e["seq"] not in done]
+            if self._entries:
+                self._append([{"ack": seq} for seq in sorted(done)])
+            else:
+                self._truncate()
+
+    # === PERSISTENCE ===
+    def _load(self):
+        entries, acked = {}, set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._torn = not line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-append
+                    if "ack" in record:
+                        acked.add(record["ack"])
+                    elif "seq" in record:
+                        entries[record["seq"]] = record
+        except OSError:
+            return
+        self._entries = [entries[seq] for seq in sorted(entries) if seq not in acked]
+        self._seq = max(entries, default=0)
+
+    def _append(self, records):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn:
+                    f.write("\n")  # end the torn line so it doesn't swallow the next record
+                    self._torn = False
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"[WARN] Could not write retry queue: {e}")
+
+    def _truncate(self):
+        try:
+            open(self.path, "w").close()
+            self._torn = False
+        except OSError as e:
+            print(f"[WARN] Could not clear retry queue: {e}")
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from spotikey_core.scheduler import call_later
+from spotikey_core.store import write_json_atomic
+
+PAGE_SIZE = 50
+TRACKS_PAGE_SIZE = 100
+
+
+def fetch_all(fetch_page, page_size, workers):
+    """Every item of a paged endpoint; the pages after the first are fetched concurrently."""
+    items, total = fetch_page(0, page_size)
+    offsets = range(page_size, total, page_size)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for page, _ in pool.map(lambda offset: fetch_page(offset, page_size), offsets):
+                items.extend(page)
+    return items
+
+
+class PlaylistDirectory:
+    """Cached directory of the user's playlists, with the track ids of each one used so far.
+
+    Names, ids and snapshot_ids come from /me/playlists (pages fetched
+    concurrently) and are kept in memory and in a JSON file, so a playlist
+    hotkey finds its target without a request. A playlist's track-id set is
+    read once, on first use, and stays valid while its snapshot_id does:
+    refresh() keeps the sets of unchanged playlists and drops the rest.
+    Writes made through Spotikey update the set and adopt the snapshot_id
+    Spotify returns, so they don't invalidate anything. The file is written
+    `save_delay` seconds after a change, off the hotkey path.
+
+    fetch_playlists(offset, limit) -> ([{"id", "name", "snapshot_id"}], total)
+    fetch_tracks(playlist_id, offset, limit) -> ([track_id, ...], total)
+    """
+
+    def __init__(self, path, fetch_playlists, fetch_tracks, workers=4, min_refresh_interval=60,
+                 save_delay=1.0, scheduler=None):
+        self.path = path
+        self.fetch_playlists = fetch_playlists
+        self.fetch_tracks = fetch_tracks
+        self.workers = workers
+        self.min_refresh_interval = min_refresh_interval
+        self.save_delay = save_delay
+        self.scheduler = scheduler
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+        self._playlists = {}
+        self._members = {}
+        self._timer = None
+        self._dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self._playlists)
+
+    def list(self):
+        with self._lock:
+            return [dict(playlist, cached=playlist["id"] in self._members) for playlist in self._playlists.values()]
+
+    # === LOOKUPS ===
+    def find(self, target):
+        """The playlist whose id or (case-insensitive) name is `target`, refreshing once if it isn't known."""
+        playlist = self._match(target)
+        if playlist is None and time.monotonic() - self.refreshed_at >= self.min_refresh_interval:
+            self.refresh()
+            playlist = self._match(target)
+        return playlist
+
+    def members(self, playlist_id):
+        """The set of track ids in a playlist; read from Spotify only when not cached for its snapshot."""
+        with self._lock:
+            members = self._members.get(playlist_id)
+            if members is not None:
+                return members
+        ids = fetch_all(lambda offset, limit: self.fetch_tracks(playlist_id, offset, limit),
+                        TRACKS_PAGE_SIZE, self.workers)
+        with self._lock:
+            members = self._members[playlist_id] = set(ids)
+            self._save()
+        return members
+
+    def _match(self, target):
+        with self._lock:
+            if target in self._playlists:
+                return self._playlists[target]
+            folded = target.casefold()
+            for playlist in self._playlists.values():
+                if playlist["name"].casefold() == folded:
+                    return playlist
+        return None
+
+    # === UPDATES ===
+    def refresh(self):
+        """Re-read the playlist list; returns how many playlists are new or changed since last time."""
+        items = fetch_all(self.fetch_playlists, PAGE_SIZE, self.workers)
+        changed = 0
+        with self._lock:
+            playlists = {}
+            for item in items:
+                old = self._playlists.get(item["id"])
+                if old is None or old["snapshot_id"] != item["snapshot_id"]:
+                    changed += 1
+                    self._members.pop(item["id"], None)
+                playlists[item["id"]] = item
+            for playlist_id in set(self._members) - set(playlists):
+                del self._members[playlist_id]
+            self._playlists = playlists
+            self.refreshed_at = time.monotonic()
+            self._save()
+        return changed
+
+    def added(self, playlist_id, ids, snapshot_id):
+        self._update(playlist_id, snapshot_id, lambda members: members.update(ids))
+
+    def removed(self, playlist_id, ids, snapshot_id):
+        self._update(playlist_id, snapshot_id, lambda members: members.difference_update(ids))
+
+    def _update(self, playlist_id, snapshot_id, change):
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            if playlist is None:
+                return
+            if snapshot_id:
+                playlist["snapshot_id"] = snapshot_id
+            if playlist_id in self._members:
+                change(self._members[playlist_id])
+            self._save()
+
+    # === PERSISTENCE ===
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._playlists = {playlist["id"]: playlist for playlist in data.get("playlists", [])}
+        for playlist_id, cached in data.get("members", {}).items():
+            playlist = self._playlists.get(playlist_id)
+            if playlist and playlist["snapshot_id"] == cached.get("snapshot_id"):
+                self._members[playlist_id] = set(cached.get("ids", []))
+
+    def flush(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = self._serialise()
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            print(f"[WARN] Could not save playlist cache: {e}")
+
+    def _save(self):
+        # Called with the lock held.
+        self._dirty = True
+        if self._timer is None:
+            self._timer = call_later(self.scheduler, self.save_delay, self.flush)
+
+    def _serialise(self):
+        return {
+            "playlists": list(self._playlists.values()),
+            "members": {playlist_id: {"snapshot_id": self._playlists[playlist_id]["snapshot_id"], "ids": sorted(ids)}
+                        for playlist_id, ids in self._members.items() if playlist_id in self._playlists},
+        }
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from spotikey_core.metrics import METRICS
+
+MISS = object()
+
+
+def hotkey_prefix(hotkey):
+    """The modifier part of a chord ("ctrl+alt+l" -> "ctrl+alt"), or None for a single key."""
+    parts = [part.strip() for part in hotkey.split("+") if part.strip()]
+    return "+".join(parts[:-1]) or None
+
+
+class Prefetcher:
+    """Starts the currently-playing lookup when the hotkey's modifiers go down.
+
+    speculate() runs fetch() on the Prefetcher's own single worker thread,
+    so a speculation never queues behind background jobs, unless one is
+    already in flight or still fresh, so held or repeated modifiers cost one
+    request. take() hands the result to the next press: it waits up to
+    `wait` seconds for an in-flight fetch rather than starting a second one,
+    and returns MISS (the press then looks the track up itself) when there
+    was no speculation, it failed or didn't finish in time, or it is older
+    than `ttl` seconds (too old to trust; that counts as wasted). At most
+    `per_minute` speculations start in any 60 seconds, so ordinary ctrl+alt
+    shortcuts can't eat the API rate limit.
+    """
+
+    def __init__(self, fetch, ttl=2.0, per_minute=6, wait=1.0):
+        self.fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spotikey-prefetch")
+        self.ttl = ttl
+        self.per_minute = per_minute
+        self.wait = wait
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.capped = 0
+        self.started = 0
+        self._future = None
+        self._started_at = 0.0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def speculate(self):
+        """Start a speculative fetch; returns False if one is already fresh or the cap is reached."""
+        with self._lock:
+            now = time.monotonic()
+            if self._future is not None:
+                if now - self._started_at < self.ttl:
+                    return False
+                self._discard()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.per_minute:
+                self.capped += 1
+                METRICS.incr("prefetch.capped")
+                return False
+            self._recent.append(now)
+            self._started_at = now
+            self._future = self._executor.submit(self.fetch)
+            self.started += 1
+        METRICS.incr("prefetch.started")
+        return True
+
+    def take(self):
+        """The speculative track for a press (None if nothing was playing), or MISS."""
+        with self._lock:
+            future, self._future = self._future, None
+            head_start = time.monotonic() - self._started_at
+            if future is not None and head_start >= self.ttl:
+                self.wasted += 1
+                METRICS.incr("prefetch.wasted")
+                future = None
+        if future is None:
+            return self._miss()
+        try:
+            track = future.result(timeout=self.wait)
+        except TimeoutError:
+            METRICS.incr("prefetch.late")
+            return self._miss()
+        except Exception:
+            return self._miss()
+        with self._lock:
+            self.hits += 1
+        METRICS.incr("prefetch.hits")
+        METRICS.observe("prefetch.head_start", head_start)
+        return track
+
+    def stats(self):
+        with self._lock:
+            used = self.hits + self.misses
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "wasted": self.wasted,
+                "capped": self.capped,
+                "hit_rate": self.hits / used if used else None,
+            }
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+        METRICS.incr("prefetch.misses")
+        return MISS
+
+    def _discard(self):
+        # Called with the lock held: a speculation nobody pressed for.
+        self._future = None
+        self.wasted += 1
+        METRICS.incr("prefetch.wasted")
@@ -0,0 +1,234 @@
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from spotikey_core.scheduler import call_later
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler covering every thread in the process.
+
+    Every `interval` seconds a background thread reads each other thread's
+    stack from sys._current_frames() and counts it, so the hotkey, Flask, Tk
+    and worker threads are all covered without instrumenting them. Nothing
+    is hooked into the interpreter: when the profiler isn't running it costs
+    nothing. Waiting (sleeps, sockets, locks) shows up as wall time, which
+    is what a slow press is made of.
+
+    Ticks land further apart than `interval` (the sampler needs the GIL,
+    and walking the stacks takes time), so each sample is weighted by the
+    time actually measured since the previous tick rather than by
+    `interval`.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.seconds = defaultdict(float)
+        self.ticks = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="spotikey-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.time()
+
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def _run(self):
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                key = (names.get(ident, str(ident)), tuple(stack))
+                self.samples[key] += 1
+                self.seconds[key] += elapsed
+            self.ticks += 1
+
+    # === REPORTS ===
+    def write_collapsed(self, path):
+        """One "thread;outer;...;inner count" line per stack (flamegraph.pl / speedscope input)."""
+        with open(path, "w", encoding="utf-8") as f:
+            for (thread, stack), count in sorted(self.samples.items()):
+                frames = [f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack]
+                f.write(";".join([f"[{thread}]"] + frames) + f" {count}\n")
+
+    def write_pstats(self, path):
+        """The samples as a pstats file (pstats.Stats(path), snakeviz); call counts are sample counts."""
+        stats = {}
+        for key, count in self.samples.items():
+            stack, seconds = key[1], self.seconds[key]
+            seen = set()
+            for i, func in enumerate(stack):
+                entry = stats.setdefault(func, [0, 0.0, 0.0, {}])
+                leaf = i == len(stack) - 1
+                entry[0] += count
+                if leaf:
+                    entry[1] += seconds
+                if func not in seen:
+                    # Recursion: count a frame's cumulative time once per sample.
+                    entry[2] += seconds
+                    seen.add(func)
+                if i:
+                    callers = entry[3]
+                    cc, tt, ct = callers.get(stack[i - 1], (0, 0.0, 0.0))
+                    callers[stack[i - 1]] = (cc + count, tt + (seconds if leaf else 0.0), ct + seconds)
+        data = {func: (nc, nc, tt, ct, {caller: (cc, cc, ctt, cct) for caller, (cc, ctt, cct) in callers.items()})
+                for func, (nc, tt, ct, callers) in stats.items()}
+        with open(path, "wb") as f:
+            marshal.dump(data, f)
+
+
+class Diagnostics:
+    """On-demand profiling and allocation tracing, with reports written to `folder`.
+
+    start_profile()/stop_profile() run a SamplingProfiler and save it as
+    spotikey_profile_<time>.prof (pstats) and .folded (collapsed stacks).
+    heap_snapshot() starts tracemalloc on first use, then saves each
+    snapshot (.snapshot, loadable with tracemalloc.Snapshot.load) and a text
+    report of the top allocation sites and the growth since the previous
+    snapshot. stop_heap() stops tracing. Until one of these is called nothing
+    is running and nothing is hooked.
+
+    on_saved(report) is called when a timed profile stops by itself.
+    """
+
+    def __init__(self, folder, scheduler=None, frames=10, on_saved=None):
+        self.folder = folder
+        self.scheduler = scheduler
+        self.frames = frames
+        self.on_saved = on_saved
+        self.profiler = None
+        self._timer = None
+        self._last_snapshot = None
+        self._lock = threading.Lock()
+
+    def status(self):
+        import tracemalloc
+        profiler = self.profiler
+        return {
+            "profiling": profiler is not None,
+            "profile_seconds": time.time() - profiler.started_at if profiler else None,
+            "tracing_allocations": tracemalloc.is_tracing(),
+            "traced_kb": tracemalloc.get_traced_memory()[0] / 1024 if tracemalloc.is_tracing() else None,
+            "folder": self.folder,
+        }
+
+    # === PROFILING ===
+    def start_profile(self, interval_ms=5, seconds=None):
+        """Start sampling; with `seconds`, stop_profile() runs by itself after that long."""
+        with self._lock:
+            if self.profiler is not None:
+                raise RuntimeError("a profile is already running")
+            self.profiler = SamplingProfiler(interval_ms / 1000.0)
+            self.profiler.start()
+            if seconds:
+                profiler = self.profiler
+                self._timer = call_later(self.scheduler, seconds, lambda: self._auto_stop(profiler))
+        return {"interval_ms": interval_ms, "seconds": seconds}
+
+    def stop_profile(self):
+        """Stop sampling and write the reports; returns their paths, or None if nothing was running."""
+        with self._lock:
+            profiler, self.profiler = self.profiler, None
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        if profiler is None:
+            return None
+        profiler.stop()
+        base = self._report_path("spotikey_profile", profiler.started_at)
+        profiler.write_pstats(base + ".prof")
+        profiler.write_collapsed(base + ".folded")
+        seconds = profiler.stopped_at - profiler.started_at
+        return {
+            "pstats": base + ".prof",
+            "collapsed": base + ".folded",
+            "samples": profiler.ticks,
+            "seconds": round(seconds, 1),
+            # The measured spacing, which the .prof times are based on; usually well above the requested interval.
+            "interval_ms": round(seconds * 1000 / profiler.ticks, 1) if profiler.ticks else None,
+        }
+
+    def _auto_stop(self, profiler):
+        if self.profiler is not profiler:
+            return  # stopped by hand (and maybe restarted) before the timer fired
+        report = self.stop_profile()
+        if report and self.on_saved:
+            self.on_saved(report)
+
+    # === ALLOCATIONS ===
+    def heap_snapshot(self, top=25):
+        """Take a tracemalloc snapshot (starting tracing if needed) and write it plus a text report."""
+        import tracemalloc
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._last_snapshot = None
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),))
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+        base = self._report_path("spotikey_heap", time.time())
+        snapshot.dump(base + ".snapshot")
+        stats = snapshot.statistics("lineno")
+        # Sum the snapshot rather than get_traced_memory(): that also counts the snapshots themselves.
+        traced_kb = sum(stat.size for stat in stats) / 1024
+        lines = [f"Traced memory: {traced_kb:.1f} KiB (peak {tracemalloc.get_traced_memory()[1] / 1024:.1f} KiB)", "",
+                 f"Top {top} allocation sites:"]
+        lines += [f"  {stat}" for stat in stats[:top]]
+        growth = None
+        if previous is None:
+            lines += ["", "First snapshot since tracing started; take another to see growth."]
+        else:
+            diff = snapshot.compare_to(previous, "lineno")
+            growth = sum(stat.size_diff for stat in diff) / 1024
+            lines += ["", f"Growth since the previous snapshot: {growth:+.1f} KiB", f"Top {top} changes:"]
+            lines += [f"  {stat}" for stat in diff[:top]]
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return {"snapshot": base + ".snapshot", "report": base + ".txt", "traced_kb": traced_kb,
+                "growth_kb": growth}
+
+    def stop_heap(self):
+        """Stop tracemalloc and forget the last snapshot; returns False if it wasn't tracing."""
+        import tracemalloc
+        with self._lock:
+            self._last_snapshot = None
+            if not tracemalloc.is_tracing():
+                return False
+            tracemalloc.stop()
+        return True
+
+    def _report_path(self, prefix, started_at):
+        os.makedirs(self.folder, exist_ok=True)
+        base = os.path.join(self.folder, f"{prefix}_{time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))}")
+        path, n = base, 1
+        while any(name.startswith(os.path.basename(path) + ".") for name in os.listdir(self.folder)):
+            n += 1
+            path = f"{base}-{n}"
+        return path
@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """A scheduled call; cancel() stops it (and any repeats) if it hasn't started yet."""
+
+    __slots__ = ("due", "func", "args", "interval", "background", "cancelled")
+
+    def __init__(self, due, func, args, interval=None, background=False):
+        self.due = due
+        self.func = func
+        self.args = args
+        self.interval = interval
+        self.background = background
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """The one thread that owns Spotikey's timers and background jobs.
+
+    Jobs wait in a heap ordered by due time. The thread sleeps on a
+    condition until the earliest job is due or an earlier one is added, so
+    an idle app has no periodic wakeups. Quick jobs run on the scheduler
+    thread; background=True hands a job to a small worker pool so a slow
+    network call can't hold up every other timer. A repeating background
+    job is rescheduled only after its previous run finishes.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="spotikey-scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # === SCHEDULING ===
+    def call_later(self, delay, func, *args, background=False):
+        return self._push(Job(time.monotonic() + max(0.0, delay), func, args, background=background))
+
+    def call_soon(self, func, *args, background=False):
+        return self.call_later(0, func, *args, background=background)
+
+    def every(self, interval, func, *args, background=False, first_delay=None):
+        """Run func every `interval` seconds; `interval` may be a callable read before each wait."""
+        delay = first_delay if first_delay is not None else _seconds(interval)
+        return self._push(Job(time.monotonic() + delay, func, args, interval=interval, background=background))
+
+    def submit(self, func, *args):
+        """Run func on the worker pool now; returns a concurrent.futures.Future."""
+        return self._pool().submit(func, *args)
+
+    def pending(self):
+        return len(self._heap)
+
+    def _push(self, job):
+        with self._cond:
+            heapq.heappush(self._heap, (job.due, next(self._seq), job))
+            if self._heap[0][2] is job:
+                self._cond.notify()
+        return job
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="spotikey-job")
+        return self._executor
+
+    # === LOOP ===
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                    job = heapq.heappop(self._heap)[2]
+                    break
+            if job.cancelled:
+                continue
+            if job.background:
+                self._pool().submit(self._call, job)
+            else:
+                self._call(job)
+
+    def _call(self, job):
+        try:
+            job.func(*job.args)
+        except Exception as e:
+            print(f"[WARN] Scheduled job {getattr(job.func, '__name__', job.func)} failed: {e}")
+        if job.interval is not None and not job.cancelled:
+            job.due = time.monotonic() + _seconds(job.interval)
+            self._push(job)
+
+
+def _seconds(interval):
+    return interval() if callable(interval) else interval
+
+
+def call_later(scheduler, delay, func):
+    """Schedule func on `scheduler`, or on a plain threading.Timer when there is none.
+
+    Either way the returned handle has cancel().
+    """
+    if scheduler is not None:
+        return scheduler.call_later(delay, func, background=True)
+    timer = threading.Timer(delay, func)
+    timer.daemon = True
+    timer.start()
+    return timer
@@ -0,0 +1,214 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+from spotikey_core.scheduler import call_later
+
+
+class ConfigStore:
+    """In-memory settings and token store with debounced, atomic write-behind.
+
+    The data file is parsed once. Reads are served from memory, writes are
+    batched onto a timer and replaced atomically, and external edits are
+    picked up by comparing the file's mtime/size rather than re-parsing it.
+
+    The keys changed since the last write are kept apart, so an external
+    edit that lands while a write is pending is merged with them rather than
+    overwritten. While the file doesn't parse the store is read-only on
+    disk: changes stay in memory and are written over the repaired file
+    once it reads cleanly again.
+    """
+
+    def __init__(self, path, defaults, write_delay=0.5, check_interval=1.0, scheduler=None):
+        self.path = path
+        self.defaults = defaults
+        self.write_delay = write_delay
+        self.check_interval = check_interval
+        self.scheduler = scheduler
+        self._lock = threading.RLock()
+        self._data = {}
+        self._stamp = None
+        self._next_check = 0.0
+        self._dirty = False
+        self._pending = {}
+        self.readonly = False
+        self._timer = None
+        self._subscribers = []
+        self._load()
+
+    # === READS ===
+    def get(self, key, default=None):
+        self.reload_if_changed()
+        with self._lock:
+            value = self._data.get(key, default)
+            if isinstance(value, (dict, list)):
+                return copy.deepcopy(value)
+            return value
+
+    def snapshot(self):
+        """Return a private copy of every setting."""
+        self.reload_if_changed()
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    # === WRITES ===
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        changed = {}
+        with self._lock:
+            for key, value in values.items():
+                if self._data.get(key) != value:
+                    self._data[key] = copy.deepcopy(value)
+                    self._pending[key] = copy.deepcopy(value)
+                    changed[key] = value
+            if changed:
+                self._dirty = True
+                self._schedule_write()
+        if changed:
+            self._publish(changed)
+
+    def flush(self):
+        """Write pending changes to disk immediately."""
+        changed = {}
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            if self._stat() != self._stamp:
+                # Edited on disk since we last read it: merge our changes onto that version.
+                old = self._data
+                self._load()
+                changed = {k: v for k, v in self._data.items() if old.get(k) != v}
+            if not self.readonly:
+                try:
+                    self._write(self._data)
+                    self._dirty = False
+                    self._pending = {}
+                except OSError as e:
+                    print(f"[WARN] Could not save settings: {e}")
+        if changed:
+            self._publish(changed)
+
+    def _schedule_write(self):
+        if self._timer is None:
+            self._timer = call_later(self.scheduler, self.write_delay, self.flush)
+
+    def _write(self, data):
+        write_json_atomic(self.path, data)
+        self._stamp = self._stat()
+
+    # === EXTERNAL EDITS ===
+    def reload_if_changed(self):
+        """Re-read the file only if its mtime or size moved since we last saw it."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        stamp = self._stat()
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            old = self._data
+            self._load()
+            changed = {k: v for k, v in self._data.items() if old.get(k) != v}
+        if changed:
+            self._publish(changed)
+        return bool(changed)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self):
+        """Read the file over the defaults, with any unwritten changes on top.
+
+        Only a missing file is seeded with the defaults. A file that doesn't
+        parse (a hand edit gone wrong) is never overwritten: the data already
+        in memory is kept and the store goes read-only until it parses again.
+        """
+        stamp = self._stat()
+        if stamp is None:
+            if not self._data:
+                self._data = copy.deepcopy(self.defaults)
+            self.readonly = False
+            try:
+                self._write(self._data)
+            except OSError as e:
+                print(f"[WARN] Could not save settings: {e}")
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read {self.path}; settings won't be saved until it is fixed: {e}")
+            if not self._data:
+                self._data = copy.deepcopy(self.defaults)
+            self.readonly = True
+            self._stamp = stamp  # don't re-read until the file changes again
+            return
+        merged = copy.deepcopy(self.defaults)
+        merged.update(data)
+        merged.update(copy.deepcopy(self._pending))
+        self._data = merged
+        self._stamp = stamp
+        if self.readonly:
+            self.readonly = False
+            if self._dirty:
+                self._schedule_write()
+
+    # === SUBSCRIPTIONS ===
+    def subscribe(self, callback, keys=None):
+        """Call callback(changed) whenever one of keys (or any key) changes.
+
+        Returns a function that removes the subscription.
+        """
+        entry = (callback, frozenset(keys) if keys else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _publish(self, changed):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, keys in subscribers:
+            if keys is not None and keys.isdisjoint(changed):
+                continue
+            try:
+                callback(dict(changed))
+            except Exception as e:
+                print(f"[WARN] Settings subscriber failed: {e}")
+
+
+def write_json_atomic(path, data):
+    """Replace `path` with `data` as JSON via a temp file, so a crash never leaves it half-written."""
+    folder = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".spotikey_", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+
+from spotikey_core.metrics import METRICS
+from spotikey_core.scheduler import call_later
+
+
+class TokenUnavailable(Exception):
+    """No usable access token: it expired and could not be refreshed."""
+
+
+class TokenManager:
+    """Keeps the Spotify access token fresh ahead of expiry.
+
+    A timer refreshes the token `margin` seconds (minus some jitter) before it
+    expires. Only one refresh is ever in flight: concurrent callers wait for
+    its result instead of starting their own. Failed refreshes are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, refresh, on_refreshed=None, on_failed=None,
+                 margin=120, jitter=30, retry_base=5, retry_max=300, scheduler=None):
+        self.refresh = refresh
+        self.on_refreshed = on_refreshed
+        self.on_failed = on_failed
+        self.margin = margin
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.scheduler = scheduler
+        self.token_info = {}
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._timer = None
+        self._failures = 0
+
+    def set_token(self, token_info):
+        with self._lock:
+            self.token_info = dict(token_info or {})
+            self._failures = 0
+        self._schedule()
+
+    def remaining(self):
+        """Seconds until the access token expires (negative once it has)."""
+        return self.token_info.get("expires_at", 0) - time.time()
+
+    def is_valid(self):
+        return bool(self.token_info.get("access_token")) and self.remaining() > 0
+
+    def headers(self):
+        """Authorization headers, refreshing first if the token has already expired."""
+        if not self.is_valid() and not self.refresh_now():
+            return None
+        return {
+            "Authorization": f"Bearer {self.token_info['access_token']}",
+            "Content-Type": "application/json"
+        }
+
+    def refresh_now(self):
+        """Refresh the token, or wait for the refresh already in flight. Returns True on success."""
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = {"done": threading.Event(), "ok": False}
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            inflight["done"].wait()
+            return inflight["ok"]
+
+        ok = False
+        try:
+            if self.token_info.get("refresh_token"):
+                refreshed = self.refresh(dict(self.token_info))
+                if refreshed:
+                    with self._lock:
+                        self.token_info = dict(refreshed)
+                        self._failures = 0
+                    ok = True
+        except Exception as e:
+            print(f"[WARN] Token refresh failed: {e}")
+        finally:
+            METRICS.incr("token.refreshes" if ok else "token.refresh_failures")
+            with self._lock:
+                inflight["ok"] = ok
+                self._inflight = None
+                if not ok:
+                    self._failures += 1
+            inflight["done"].set()
+
+        if ok and self.on_refreshed:
+            self.on_refreshed(self.token_info)
+        self._schedule()
+        return ok
+
+    def stop(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self.token_info.get("refresh_token"):
+                return
+            failures = self._failures
+            if failures:
+                delay = min(self.retry_max, self.retry_base * 2 ** (failures - 1))
+                delay *= random.uniform(0.8, 1.2)
+            else:
+                delay = self.remaining() - self.margin - random.uniform(0, self.jitter)
+            self._timer = call_later(self.scheduler, max(0.0, delay), self.refresh_now)
+        if failures and self.on_failed:
+            self.on_failed(failures, delay)
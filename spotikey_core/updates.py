@@ -0,0 +1,86 @@
+import json
+import re
+import time
+
+import requests
+
+from spotikey_core.store import write_json_atomic
+
+
+def parse_version(text):
+    """Split "v1.2.3-beta" into ((1, 2, 3), "beta")."""
+    match = re.match(r"^[vV]?([0-9]+(?:\.[0-9]+)*)(.*)$", (text or "").strip())
+    if not match:
+        return (), ""
+    numbers = tuple(int(part) for part in match.group(1).split("."))
+    return numbers, match.group(2).lstrip("-+.")
+
+
+def is_newer(latest, current):
+    """True if `latest` is a higher version than `current`."""
+    latest_numbers, latest_pre = parse_version(latest)
+    current_numbers, current_pre = parse_version(current)
+    if not latest_numbers:
+        return False
+    width = max(len(latest_numbers), len(current_numbers))
+    latest_numbers += (0,) * (width - len(latest_numbers))
+    current_numbers += (0,) * (width - len(current_numbers))
+    if latest_numbers != current_numbers:
+        return latest_numbers > current_numbers
+    # Same numbers: a final release beats a pre-release; pre-releases compare by tag.
+    if not latest_pre or not current_pre:
+        return not latest_pre and bool(current_pre)
+    return latest_pre > current_pre
+
+
+class ReleaseChecker:
+    """Cached lookup of the latest GitHub release tag.
+
+    Within `ttl` seconds the cached tag is returned without any request.
+    After that (or when forced) the cached ETag is revalidated with
+    If-None-Match, so an unchanged release costs a single 304, which GitHub
+    does not count against the anonymous rate limit.
+    """
+
+    def __init__(self, url, cache_path, ttl=6 * 3600, timeout=5):
+        self.url = url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache = self._load()
+
+    def latest_tag(self, force=False):
+        cache = self._cache
+        if not force and cache.get("tag") is not None and time.time() - cache.get("checked_at", 0) < self.ttl:
+            return cache["tag"]
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            cache["checked_at"] = time.time()
+        elif response.status_code == 200:
+            cache = {
+                "tag": response.json().get("tag_name", ""),
+                "etag": response.headers.get("ETag"),
+                "checked_at": time.time(),
+            }
+        else:
+            return cache.get("tag")
+        self._cache = cache
+        self._save(cache)
+        return cache.get("tag")
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, cache):
+        try:
+            write_json_atomic(self.cache_path, cache)
+        except OSError as e:
+            print(f"[WARN] Could not save update cache: {e}")
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from spotikey_core.actions import ActionQueue
+from spotikey_core.library import LibraryIndex
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the action worker")
+        time.sleep(0.005)
+
+
+class FakeSpotify:
+    """The callables ActionQueue is wired to, recording every call."""
+
+    def __init__(self, tracks, library=None):
+        self.tracks = list(tracks)
+        self.library = library
+        self.lookups = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.looking = threading.Event()
+        self.saved, self.removed, self.skipped, self.errors = [], [], [], []
+
+    def resolve(self):
+        self.lookups += 1
+        self.looking.set()
+        self.gate.wait()
+        track = self.tracks.pop(0) if len(self.tracks) > 1 else self.tracks[0]
+        return dict(track) if track else None
+
+    def save(self, ids):
+        if self.library is not None:
+            self.library.add(ids)
+
+    def remove(self, ids):
+        if self.library is not None:
+            self.library.remove(ids)
+
+    def queue(self, mode="like", **kwargs):
+        actions = ActionQueue(self.resolve, self.save, self.saved.append,
+                              lambda tracks, e: self.errors.append(e),
+                              library=self.library, remove_tracks=self.remove, on_removed=self.removed.append,
+                              on_skipped=self.skipped.append, toggle=lambda: mode == "toggle", **kwargs)
+        actions.start()
+        return actions
+
+    def press_during_lookup(self, actions, presses):
+        """Press once, then `presses` more times while that lookup is still in flight."""
+        self.gate.clear()
+        actions.press()
+        assert self.looking.wait(2.0)
+        for _ in range(presses):
+            actions.press()
+        self.gate.set()
+
+
+def ids(batches):
+    return [[t["id"] for t in batch] for batch in batches]
+
+
+@pytest.fixture
+def library(tmp_path):
+    return LibraryIndex(str(tmp_path / "library.db"))
+
+
+def test_presses_during_a_lookup_reuse_its_track(library):
+    spotify = FakeSpotify([{"id": "a"}], library)
+    actions = spotify.queue()
+    spotify.press_during_lookup(actions, presses=2)
+    wait_for(lambda: spotify.saved and spotify.skipped)
+    assert spotify.lookups == 1
+    assert ids(spotify.saved) == [["a"]]
+    assert ids(spotify.skipped) == [["a"]]
+
+
+def test_toggle_press_during_a_lookup_undoes_the_like(library):
+    spotify = FakeSpotify([{"id": "a"}], library)
+    actions = spotify.queue(mode="toggle")
+    spotify.press_during_lookup(actions, presses=1)
+    wait_for(lambda: spotify.removed)
+    assert spotify.lookups == 1
+    assert ids(spotify.saved) == [["a"]]
+    assert ids(spotify.removed) == [["a"]]
+    assert "a" not in library
+
+
+def test_presses_during_a_failed_lookup_resolve_again():
+    spotify = FakeSpotify([None, {"id": "b"}])
+    actions = spotify.queue()
+    spotify.press_during_lookup(actions, presses=1)
+    wait_for(lambda: spotify.saved)
+    assert spotify.lookups == 2
+    assert ids(spotify.saved) == [["b"]]
+
+
+def test_index_never_suppresses_a_plain_like(library):
+    library.add(["a"])  # saved as far as the index knows, but unliked in Spotify since
+    spotify = FakeSpotify([{"id": "a"}], library)
+    actions = spotify.queue()
+    actions.press()
+    wait_for(lambda: spotify.saved)
+    assert ids(spotify.saved) == [["a"]]
+    assert not spotify.skipped and not spotify.removed
+
+
+def test_toggle_press_on_a_saved_track_removes_it(library):
+    library.add(["a"])
+    spotify = FakeSpotify([{"id": "a"}], library)
+    actions = spotify.queue(mode="toggle")
+    actions.press()
+    wait_for(lambda: spotify.removed)
+    actions.press()
+    wait_for(lambda: spotify.saved)
+    assert ids(spotify.removed) == [["a"]]
+    assert ids(spotify.saved) == [["a"]]
+    assert "a" in library
+
+
+def test_recent_likes_are_skipped_within_the_dedupe_window():
+    spotify = FakeSpotify([{"id": "a"}])
+    actions = spotify.queue()
+    actions.like([{"id": "a"}, {"id": "b"}])
+    wait_for(lambda: spotify.saved)
+    actions.like([{"id": "b"}, {"id": "c"}])
+    wait_for(lambda: len(spotify.saved) == 2)
+    assert ids(spotify.saved) == [["a", "b"], ["c"]]
+    assert ids(spotify.skipped) == [["b"]]
@@ -0,0 +1,58 @@
+from spotikey_core.library import PAGE_SIZE, LibraryIndex
+
+
+class SavedTracks:
+    """A fake GET /me/tracks: newest first, paged like Spotify's."""
+
+    def __init__(self, count):
+        self.items = [(f"t{i:04d}", f"2026-01-01T00:00:{i:02d}Z") for i in reversed(range(count))]
+        self.offsets = []
+
+    def like(self, track_id, added_at):
+        self.items.insert(0, (track_id, added_at))
+
+    def unlike(self, track_id):
+        self.items = [item for item in self.items if item[0] != track_id]
+
+    def fetch_page(self, offset, limit):
+        self.offsets.append(offset)
+        return list(self.items[offset:offset + limit]), len(self.items)
+
+
+def test_first_sync_indexes_every_page(tmp_path):
+    spotify = SavedTracks(2 * PAGE_SIZE + 10)
+    library = LibraryIndex(str(tmp_path / "library.db"))
+    assert library.sync(spotify.fetch_page) == 2 * PAGE_SIZE + 10
+    assert len(library) == 2 * PAGE_SIZE + 10
+    assert sorted(spotify.offsets) == [0, PAGE_SIZE, 2 * PAGE_SIZE]
+
+
+def test_later_syncs_stop_at_known_tracks(tmp_path):
+    spotify = SavedTracks(3 * PAGE_SIZE)
+    library = LibraryIndex(str(tmp_path / "library.db"))
+    library.sync(spotify.fetch_page)
+    spotify.like("new", "2026-02-01T00:00:00Z")
+    spotify.offsets.clear()
+    assert library.sync(spotify.fetch_page) == 1
+    assert "new" in library
+    assert spotify.offsets == [0]
+
+
+def test_sync_drops_tracks_unliked_elsewhere(tmp_path):
+    spotify = SavedTracks(PAGE_SIZE + 5)
+    library = LibraryIndex(str(tmp_path / "library.db"))
+    library.sync(spotify.fetch_page)
+    spotify.unlike("t0003")
+    library.sync(spotify.fetch_page)
+    assert "t0003" not in library
+    assert len(library) == PAGE_SIZE + 4
+
+
+def test_index_survives_a_restart(tmp_path):
+    path = str(tmp_path / "library.db")
+    library = LibraryIndex(path)
+    library.add(["a", "b"])
+    library.remove(["a"])
+    reopened = LibraryIndex(path)
+    assert "b" in reopened and "a" not in reopened
+    assert len(reopened) == 1
@@ -0,0 +1,51 @@
+import threading
+
+from spotikey_core.outbox import MutationOutbox
+
+
+class Recorder:
+    def __init__(self, expected):
+        self.calls = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def send(self, op, ids):
+        self.calls.append((op, ids))
+
+    def on_sent(self, op, ids):
+        if sum(len(ids) for _, ids in self.calls) >= self.expected:
+            self.done.set()
+
+
+def never_sent(op, ids):
+    raise AssertionError("the first outbox is never started")
+
+
+def test_backlog_is_replayed_after_a_restart(tmp_path):
+    path = str(tmp_path / "spotikey_outbox.jsonl")
+    outbox = MutationOutbox(path, never_sent, lambda e: True)
+    outbox.add("save", ["a", "b"])
+    outbox.add("save", ["c"])
+    outbox.add("remove", ["a"])
+
+    recorder = Recorder(expected=4)
+    restarted = MutationOutbox(path, recorder.send, lambda e: True, on_sent=recorder.on_sent)
+    assert restarted.pending() == 3
+    restarted.start()
+    assert recorder.done.wait(2.0)
+    # Consecutive entries of the same kind go out as one request, in order.
+    assert recorder.calls == [("save", ["a", "b", "c"]), ("remove", ["a"])]
+    assert MutationOutbox(path, never_sent, lambda e: True).pending() == 0
+
+
+def test_acknowledged_entries_and_torn_lines_are_not_replayed(tmp_path):
+    path = str(tmp_path / "spotikey_outbox.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"seq":1,"op":"save","ids":["a"]}\n'
+                '{"seq":2,"op":"save","ids":["b"]}\n'
+                '{"ack":1}\n'
+                '{"seq":3,"op":"sa')
+    outbox = MutationOutbox(path, never_sent, lambda e: True)
+    assert outbox.pending() == 1
+    outbox.add("save", ["c"])
+    assert [entry["seq"] for entry in MutationOutbox(path, never_sent, lambda e: True)._entries] == [2, 3]
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from spotikey_core.store import ConfigStore
+
+DEFAULTS = {"hotkey": "ctrl+alt+l", "notifications": True}
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    # Make sure the store sees a new stamp even on coarse-mtime filesystems.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "spotikey_data.json")
+
+
+def open_store(path):
+    # No background writes or throttled re-reads: the tests call flush() themselves.
+    return ConfigStore(path, DEFAULTS, write_delay=3600, check_interval=0)
+
+
+def test_missing_file_is_seeded_with_defaults(path):
+    store = open_store(path)
+    assert read(path) == DEFAULTS
+    assert store.get("hotkey") == "ctrl+alt+l"
+
+
+def test_corrupt_file_is_never_overwritten(path):
+    write(path, '{"hotkey": "ctrl+shift+k",')
+    store = open_store(path)
+    assert store.readonly
+    assert store.get("hotkey") == "ctrl+alt+l"
+    store.set("token_info", {"access_token": "x"})
+    store.flush()
+    with open(path) as f:
+        assert f.read() == '{"hotkey": "ctrl+shift+k",'
+
+
+def test_repaired_file_gets_the_changes_made_meanwhile(path):
+    write(path, "{not json")
+    store = open_store(path)
+    store.set("token_info", {"access_token": "x"})
+    write(path, '{"hotkey": "ctrl+shift+k"}')
+    assert store.get("hotkey") == "ctrl+shift+k"
+    assert not store.readonly
+    store.flush()
+    assert read(path) == {**DEFAULTS, "hotkey": "ctrl+shift+k", "token_info": {"access_token": "x"}}
+
+
+def test_external_edit_under_a_pending_write_is_merged(path):
+    store = open_store(path)
+    changes = []
+    store.subscribe(changes.append)
+    store.set("token_info", {"access_token": "x"})
+    write(path, json.dumps({**DEFAULTS, "hotkey": "ctrl+shift+k"}))
+    store.flush()
+    assert read(path) == {**DEFAULTS, "hotkey": "ctrl+shift+k", "token_info": {"access_token": "x"}}
+    assert store.get("hotkey") == "ctrl+shift+k"
+    assert {"hotkey": "ctrl+shift+k"} in changes